@@ -1,57 +1,189 @@
-import argparse, sys
-from routers.flybox import FlyboxRouter
-from utils.consts import GATEWAY_ERROR, INCOMPATIBLE, ROUTER_NOT_SUPPORTED
+import argparse, json, sys
+from routers.registry import default_registry
+from utils.batch import ACTIONS, WRITE_ACTIONS, parse_script, run_actions, unsupported_actions, validate_actions
+from utils.consts import ACTION_NOT_SUPPORTED, EXPERIMENTAL_ACTION, GATEWAY_ERROR, INCOMPATIBLE, ROUTER_NOT_SUPPORTED
+from storage.backup import FAILED, BackupStore, backup_fleet
+from utils.exporter import MetricsExporter, parse_address
 from utils.functions import handle_error
 from utils.network import get_gateway_ip
+from utils.output import FORMATS, JSON, TEXT, OutputWriter
 
 from utils import settings
 
 def main():
 
-    commands = ['info', 'restart', 'devices', 'macfiltering']
-
     parser = argparse.ArgumentParser(description='Interact with routers')
     parser.add_argument('username', help='Router username')
     parser.add_argument('password', help='Router password')
-    parser.add_argument('action', choices=commands, help='Action to perform: info, restart, devices')
-    parser.add_argument('extra', nargs='*', default=[], help='Additional arguments for the devices action')
-    parser.add_argument('-j', '--as-json', action='store_true', help='Print output as JSON')
+    parser.add_argument('actions', nargs='*', metavar='action',
+                        help=f"Actions to perform over one login: {', '.join(ACTIONS)}, or '-' to read them from stdin")
+    parser.add_argument('-j', '--as-json', action='store_const', const=JSON, dest='format', help='Print output as JSON')
+    parser.add_argument('-f', '--format', choices=FORMATS, help='Output format')
+    parser.add_argument('--driver', help='Use this driver instead of detecting the router model')
+    parser.add_argument('--drivers-config', help='JSON file listing additional drivers')
+    parser.add_argument('--exporter', metavar='[HOST:]PORT', help='Serve Prometheus metrics instead of running actions')
+    parser.add_argument('--backup', metavar='DIR', help='Back up the router configurations into this directory instead of running actions')
+    parser.add_argument('--targets', '--exporter-targets', metavar='FILE', dest='targets',
+                        help='JSON list of routers to export or back up, each with a name, gateway, username, password and optional driver')
+    parser.add_argument('--record', metavar='FILE', help='Record the router HTTP traffic into this archive, credentials redacted')
+    parser.add_argument('--replay', metavar='FILE', help='Answer the router requests from a recorded archive, requires --driver')
+    parser.add_argument('--replay-latency', metavar='SCALE', type=float, default=1.0,
+                        help='Factor applied to the recorded latencies when replaying, 0 to answer immediately')
+    # -j and -f share their destination, so the default is set once for both.
+    parser.set_defaults(format=settings.OUTPUT_FORMAT)
 
     args = parser.parse_args()
 
-    settings.AS_JSON = args.as_json
+    try:
+        actions = parse_script(sys.stdin) if args.actions == ['-'] else validate_actions(args.actions)
+    except ValueError as ex:
+        parser.error(str(ex))
+    if args.exporter and args.backup:
+        parser.error('--exporter and --backup cannot be used together')
+    if args.exporter or args.backup:
+        if actions:
+            parser.error('actions cannot be given with --exporter or --backup')
+        if args.record or args.replay:
+            parser.error('--record and --replay cannot be used with --exporter or --backup')
+    elif args.targets:
+        parser.error('--targets requires --exporter or --backup')
+    elif not actions:
+        parser.error('no action given')
+
+    settings.OUTPUT_FORMAT = args.format
+    output = OutputWriter(fmt=args.format)
 
-    gateway = get_gateway_ip()
-    if not gateway:
+    if args.replay and not args.driver:
+        parser.error('--replay requires --driver')
+
+    # The targets name their own gateways, the local one is not needed.
+    gateway = get_gateway_ip() if not args.targets else None
+    if args.replay:
+        # Recordings hold paths only, any host name does.
+        gateway = gateway or 'router.invalid'
+    if not gateway and not args.targets:
         handle_error(GATEWAY_ERROR)
         return 1
 
-    routers = [FlyboxRouter]
+    registry = default_registry(args.drivers_config)
+    if args.driver and args.driver not in registry.specs:
+        parser.error(f"unknown driver '{args.driver}', choose from {', '.join(registry.specs)}")
+
+    if args.targets:
+        with open(args.targets) as f:
+            targets = json.load(f)
+    elif args.exporter or args.backup:
+        targets = [{'name': gateway, 'gateway': gateway, 'username': args.username, 'password': args.password, 'driver': args.driver}]
+
+    if args.exporter:
+        try:
+            address = parse_address(args.exporter)
+        except ValueError as ex:
+            parser.error(str(ex))
+        return export(login_targets(registry, targets), address)
+
+    if args.backup:
+        return backup(login_targets(registry, targets), args.backup, output)
+
+    drivers = [registry.get(args.driver)] if args.driver else registry.detect(gateway)
 
-    for r_cls in routers:
-        router = r_cls(args.username, args.password)
+    for driver in drivers:
+        # The write requests of an experimental driver were never checked against a device.
+        writes = [action for action in actions if action in WRITE_ACTIONS]
+        if driver.experimental and writes:
+            handle_error(EXPERIMENTAL_ACTION, ', '.join(writes))
+            return 1
+
+        router = driver.load()(args.username, args.password)
+        # Checked before logging in, a missing method would otherwise end the run in a traceback.
+        unsupported = unsupported_actions(router, actions)
+        if unsupported:
+            handle_error(ACTION_NOT_SUPPORTED, ', '.join(unsupported))
+            return 1
+
+        router.gateway = gateway
+        if args.record:
+            router.sess.record(args.record, {'driver': driver.name})
+        if args.replay:
+            router.sess.replay(args.replay, args.replay_latency)
         results, response_text = router.login()
 
         if results != True:
+            # Closing the session completes a recording.
+            router.sess.close()
             if results == INCOMPATIBLE: continue
             handle_error(results)
             return 1
 
-        if args.action == "info":
-            print(router.get_router_information())
-        elif args.action == "restart":
-            router.restart_router()
-        elif args.action == 'macfiltering':
-            print(router.get_mac_filters().display())
-        elif args.action.startswith("devices"):
-            if args.action == "devices":
-                print(router.get_connected_devices().display())
-        
-        router.logout()
+        if driver.experimental:
+            print(f"Warning: the {driver.name} driver is experimental, some of its pages were never checked against a device.",
+                  file=sys.stderr)
+
+        try:
+            action_results = run_actions(router, actions)
+        finally:
+            # Log out and complete a recording even when an action fails.
+            try:
+                router.logout()
+            finally:
+                router.sess.close()
+
+        if len(action_results) > 1 or (args.format != TEXT and not hasattr(action_results[0][1], 'records')):
+            output.write_results(action_results)
+        elif hasattr(action_results[0][1], 'records'):
+            output.write(action_results[0][1])
+
         return 0
 
     handle_error(ROUTER_NOT_SUPPORTED)
     return 1
 
+def login_target(registry, target):
+    """ Log in to an exporter target, returns the router or None. """
+    gateway = target['gateway']
+    drivers = [registry.get(target['driver'])] if target.get('driver') else registry.detect(gateway)
+    for driver in drivers:
+        router = driver.load()(target['username'], target['password'])
+        router.gateway = gateway
+        results, _ = router.login()
+        if results == True:
+            return router
+        if results != INCOMPATIBLE:
+            handle_error(results)
+            return None
+    handle_error(ROUTER_NOT_SUPPORTED)
+    return None
+
+def login_targets(registry, targets):
+    """ Log in to the targets that can be reached, by name. """
+    routers = {}
+    for target in targets:
+        router = login_target(registry, target)
+        if router:
+            routers[target.get('name', target['gateway'])] = router
+    return routers
+
+def export(routers, address):
+    """ Serve the metrics of the routers until interrupted. """
+    if not routers:
+        return 1
+
+    MetricsExporter(routers, address).serve_forever()
+    for router in routers.values():
+        router.logout()
+    return 0
+
+def backup(routers, path, output):
+    """ Back up the documents of the routers, returns 1 if any failed. """
+    if not routers:
+        return 1
+
+    with BackupStore(path) as store:
+        report = backup_fleet(store, routers)
+    output.write(report)
+    for router in routers.values():
+        router.logout()
+    return 1 if any(b.status == FAILED for b in report.backups) else 0
+
 if __name__ == '__main__':
     sys.exit(main())
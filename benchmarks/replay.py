@@ -0,0 +1,66 @@
+"""
+Measures the throughput of a driver against a recorded router session.
+
+Record a session with the CLI, e.g.
+    python __main__.py USER PASS info devices macfiltering --record flybox-11.0.2.1.jsonl.gz
+
+then replay it offline, as many times as needed:
+    python -m benchmarks.replay flybox-11.0.2.1.jsonl.gz --actions info devices macfiltering
+
+With the default latency scale of 0 the figures are the client cost of the
+driver (requests, parsing and models), with 1 they include the recorded
+router latencies.
+"""
+import argparse
+import time
+
+from routers.recording import load_archive
+from routers.registry import default_registry
+from utils.batch import ACTIONS, run_actions, validate_actions
+
+
+def replay_router(driver, archive, latency_scale=0.0):
+    """
+    Create a router of a driver answered by a recording, logged in.
+
+    Args:
+        driver (DriverSpec): The driver of the recorded router.
+        archive (str): The recording.
+        latency_scale (float): The factor applied to the recorded latencies.
+
+    Returns:
+        Router: The router.
+    """
+    router = driver.load()('user', 'password')
+    router.gateway = 'router.invalid'
+    router.sess.replay(archive, latency_scale)
+    router.login()
+    return router
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a recorded router session and measure its throughput')
+    parser.add_argument('archive', help='The recording')
+    parser.add_argument('--driver', help='The driver, defaults to the one stored in the recording')
+    parser.add_argument('--actions', nargs='+', default=['info'], help=f"The actions to run: {', '.join(ACTIONS)}")
+    parser.add_argument('--iterations', type=int, default=100, help='The number of runs of the actions')
+    parser.add_argument('--latency', type=float, default=0.0, help='The factor applied to the recorded latencies')
+    args = parser.parse_args()
+
+    header, exchanges = load_archive(args.archive)
+    driver = default_registry().get(args.driver or header['driver'])
+    actions = validate_actions(args.actions)
+    router = replay_router(driver, args.archive, args.latency)
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        run_actions(router, actions)
+    elapsed = time.perf_counter() - start
+
+    print(f"recording: {len(exchanges)} exchanges, driver {driver.name}, {', '.join(f'{k}={v}' for k, v in header.items() if k != 'driver')}")
+    print(f"{args.iterations} runs of {' '.join(actions)} in {elapsed:.3f} s: "
+          f"{args.iterations / elapsed:.1f} runs/s, {elapsed / args.iterations * 1e3:.2f} ms/run")
+
+
+if __name__ == '__main__':
+    main()
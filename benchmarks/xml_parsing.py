@@ -0,0 +1,252 @@
+"""
+Compares the response parsing of the Flybox endpoints before and after `utils.xml`.
+
+The old way decodes every body and parses it with ElementTree, looking each
+field up twice with `find`. The new way works on the response bytes with the
+fastest backend available, scanning flat documents without parsing, and
+checks status codes with a plain bytes `in` instead of decoding.
+
+The status checks (state-login) take well under a microsecond either way and
+are not faster on bytes, they are only listed to show they did not regress
+meaningfully. HostInfo, many small records, is about on par with ElementTree.
+The parsing cases are where the time goes.
+
+Before timing, the scanner is checked against ElementTree on the documents
+below and on edge cases (references, empty elements, attributes).
+
+Run from the repository root:
+    python -m benchmarks.xml_parsing
+"""
+import timeit
+import xml.etree.ElementTree as ET
+
+from models.information.flybox import FlyboxInformation
+from models.mac_filtering.flybox import MacFilteringFlybox
+from models.traffic.flybox import FlyboxTrafficStatistics
+from models.user_device.base import UserDeviceBase
+from utils.xml import BACKEND, find_text, leaves, parse, records
+
+
+HEADER = b'<?xml version="1.0" encoding="UTF-8"?>'
+
+TOKEN = HEADER + b'<response><token>' + b'f' * 64 + b'</token></response>'
+
+STATE_LOGIN = HEADER + (
+    b'<response><State>-1</State><Username></Username><password_type>4</password_type>'
+    b'<extern_password_type>1</extern_password_type><firstlogin>0</firstlogin></response>'
+)
+
+CHALLENGE = HEADER + (
+    b'<response><salt>' + b'a' * 64 + b'</salt><iterations>100</iterations>'
+    b'<servernonce>' + b'b' * 96 + b'</servernonce><modeselected>1</modeselected></response>'
+)
+
+INFORMATION = HEADER + (
+    b'<response><DeviceName>B612-233</DeviceName><SerialNumber>ABCDEF0123456789</SerialNumber>'
+    b'<Imei>861234567890123</Imei><Imsi>604001234567890</Imsi><HardwareVersion>WL2B612M</HardwareVersion>'
+    b'<SoftwareVersion>11.0.2.1</SoftwareVersion><WebUIVersion>WEBUI 11.0.2.1</WebUIVersion>'
+    b'<iniversion>B612-233-CUST 11.0.2.1</iniversion><MacAddress1>00:11:22:33:44:55</MacAddress1>'
+    b'<WanIPAddress>10.0.0.1</WanIPAddress><WanIPv6Address></WanIPv6Address></response>'
+)
+
+SIGNAL = HEADER + (
+    b'<response><cell_id>12345678</cell_id><rsrq>-11.0dB</rsrq><rsrp>-95dBm</rsrp><rssi>-67dBm</rssi>'
+    b'<sinr>8dB</sinr><txpower>PPusch:23dBm</txpower><cqi0>11</cqi0><cqi1>9</cqi1>'
+    b'<plmn>60400</plmn><band>3</band></response>'
+)
+
+HOST = (
+    b'<Host><ActualName>device-%d</ActualName><IpAddress>192.168.8.%d</IpAddress>'
+    b'<MacAddress>00:11:22:33:44:%02x</MacAddress><InterfaceType>Wireless</InterfaceType>'
+    b'<LeaseTime>3600</LeaseTime><Active>1</Active><isLocalDevice>0</isLocalDevice></Host>'
+)
+
+HOST_INFO = HEADER + b'<response><Hosts>' + b''.join(HOST % (i, i, i) for i in range(32)) + b'</Hosts></response>'
+
+MAC_FILTER = HEADER + b'<response><Ssids><Ssid><Index>0</Index><WifiMacFilterStatus>2</WifiMacFilterStatus>' + (
+    b'<wifimacblacklist>' + b''.join(b'<WifiMacFilterMac%d>00:11:22:33:44:%02x</WifiMacFilterMac%d>' % (i, i, i) for i in range(32))
+    + b'</wifimacblacklist>'
+    + b''.join(b'<wifihostname%d>device-%d</wifihostname%d>' % (i, i, i) for i in range(32))
+) + b'</Ssid></Ssids></response>'
+
+TRAFFIC = HEADER + (
+    b'<response><CurrentConnectTime>1234</CurrentConnectTime><CurrentUpload>123456</CurrentUpload>'
+    b'<CurrentDownload>654321</CurrentDownload><CurrentDownloadRate>1000</CurrentDownloadRate>'
+    b'<CurrentUploadRate>100</CurrentUploadRate><TotalUpload>12345678</TotalUpload>'
+    b'<TotalDownload>87654321</TotalDownload><TotalConnectTime>123456</TotalConnectTime></response>'
+)
+
+
+# Documents the scanner must read exactly as ElementTree does.
+EDGE_CASES = (
+    b'<response><ActualName>a&amp;b &#39;x&#39; &#x41;&lt;&gt;&quot;&apos;</ActualName></response>',
+    HEADER + b'<response><ActualName/><IpAddress></IpAddress><MacAddress >00:11:22:33:44:55</MacAddress></response>',
+    HEADER + b'<response><Name type="x">y</Name><Empty a="1"/><Url>http://a/?b=c</Url></response>',
+)
+
+HOST_EDGE_CASE = (
+    b'<response><Hosts><Host><ActualName/><Active>1</Active></Host>'
+    b'<Host><ActualName>x &#233;</ActualName></Host></Hosts></response>'
+)
+
+
+def check():
+    """ Check that `leaves` and `records` read the documents as ElementTree does. """
+    for document in (TOKEN, STATE_LOGIN, CHALLENGE, INFORMATION, SIGNAL, TRAFFIC) + EDGE_CASES:
+        root = ET.fromstring(document)
+        expected = {}
+        for child in root:
+            if len(child) == 0:
+                expected.setdefault(child.tag, child.text or '')
+        assert leaves(document) == expected, (document, leaves(document), expected)
+    for document in (HOST_INFO, HOST_EDGE_CASE):
+        expected = [{child.tag: child.text or '' for child in host} for host in ET.fromstring(document).iter('Host')]
+        assert records(document, 'Host') == expected, (document, records(document, 'Host'), expected)
+
+
+def _old_find(root, tag):
+    return root.find(tag).text if root.find(tag) is not None else ''
+
+
+def _old_merge(element1, element2):
+    merged = ET.Element(element1.tag)
+    merged.text = element1.text
+    for child1 in element1:
+        child2 = element2.find(child1.tag)
+        merged.append(_old_merge(child1, child2) if child2 is not None else child1)
+    for child2 in element2:
+        if element1.find(child2.tag) is None:
+            merged.append(child2)
+    return merged
+
+
+def old_token():
+    return ET.fromstring(TOKEN.decode()).find('token').text[32:]
+
+
+def new_token():
+    return find_text(TOKEN, 'token')[32:]
+
+
+def old_state_login():
+    return '<State>0</State>' in STATE_LOGIN.decode()
+
+
+def new_state_login():
+    return b'<State>0</State>' in STATE_LOGIN
+
+
+def old_challenge():
+    root = ET.fromstring(CHALLENGE.decode())
+    return _old_find(root, 'iterations'), _old_find(root, 'servernonce'), _old_find(root, 'salt')
+
+
+def new_challenge():
+    challenge = leaves(CHALLENGE)
+    return challenge.get('iterations', ''), challenge.get('servernonce', ''), challenge.get('salt', '')
+
+
+def old_information():
+    merged = ET.tostring(_old_merge(ET.fromstring(INFORMATION.decode()), ET.fromstring(SIGNAL.decode())))
+    root = ET.fromstring(merged)
+    return [_old_find(root, tag) for tag in (
+        'DeviceName', 'SerialNumber', 'Imei', 'Imsi', 'HardwareVersion', 'SoftwareVersion', 'WebUIVersion',
+        'iniversion', 'MacAddress1', 'WanIPAddress', 'WanIPv6Address', 'cell_id', 'rsrq', 'rsrp', 'rssi',
+        'sinr', 'txpower', 'plmn', 'band',
+    )]
+
+
+def new_information():
+    values = leaves(SIGNAL)
+    values.update(leaves(INFORMATION))
+    return FlyboxInformation.from_values(values)
+
+
+def old_host_info():
+    root = ET.fromstring(HOST_INFO.decode())
+    return [
+        UserDeviceBase(
+            node.find('ActualName').text,
+            node.find('IpAddress').text,
+            node.find('MacAddress').text,
+            node.find('InterfaceType').text,
+            24 * 3600 - int(node.find('LeaseTime').text),
+            node.find('Active').text == '1',
+            node.find('isLocalDevice').text == '1',
+        ) for node in root.findall('Hosts/Host')
+    ]
+
+
+def new_host_info():
+    devices = []
+    for host in records(HOST_INFO, 'Host'):
+        lease_time = host.get('LeaseTime')
+        devices.append(UserDeviceBase(
+            host.get('ActualName') or None,
+            host.get('IpAddress') or None,
+            host.get('MacAddress') or None,
+            host.get('InterfaceType') or None,
+            24 * 3600 - int(lease_time) if lease_time else None,
+            host.get('Active') == '1',
+            host.get('isLocalDevice') == '1',
+        ))
+    return devices
+
+
+def old_mac_filter():
+    root = ET.fromstring(MAC_FILTER.decode())
+    users = []
+    for ssid in root.findall('.//Ssid'):
+        for item in ssid.find('.//wifimacblacklist'):
+            index = item.tag.replace('WifiMacFilterMac', '')
+            users.append(UserDeviceBase(
+                name=ssid.find(f'.//wifihostname{index}').text,
+                mac_address=item.text,
+                ip_address='',
+                interface='',
+                uptime='',
+                active=False,
+                is_local=False,
+            ))
+    return users
+
+
+def new_mac_filter():
+    return [MacFilteringFlybox.from_xml(ssid) for ssid in parse(MAC_FILTER).findall('.//Ssid')]
+
+
+def old_traffic():
+    root = ET.fromstring(TRAFFIC.decode())
+    return [int(_old_find(root, tag) or 0) for tag in (
+        'CurrentConnectTime', 'CurrentUpload', 'CurrentDownload', 'CurrentDownloadRate',
+        'CurrentUploadRate', 'TotalUpload', 'TotalDownload', 'TotalConnectTime',
+    )]
+
+
+def new_traffic():
+    return FlyboxTrafficStatistics.from_xml_string(TRAFFIC)
+
+
+CASES = {
+    'token': (old_token, new_token),
+    'state-login': (old_state_login, new_state_login),
+    'challenge_login': (old_challenge, new_challenge),
+    'information+signal': (old_information, new_information),
+    'HostInfo': (old_host_info, new_host_info),
+    'multi-macfilter-settings-ex': (old_mac_filter, new_mac_filter),
+    'traffic-statistics': (old_traffic, new_traffic),
+}
+
+
+def main(number=2000, repeat=5):
+    check()
+    print(f'backend: {BACKEND}')
+    print(f'{"endpoint":<30}{"old (us)":>12}{"new (us)":>12}{"speedup":>10}')
+    for name, (old, new) in CASES.items():
+        old_time = min(timeit.repeat(old, number=number, repeat=repeat)) / number * 1e6
+        new_time = min(timeit.repeat(new, number=number, repeat=repeat)) / number * 1e6
+        print(f'{name:<30}{old_time:>12.2f}{new_time:>12.2f}{old_time / new_time:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
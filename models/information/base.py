@@ -1,7 +1,6 @@
 from dataclasses import dataclass
-import json
 
-from utils import settings
+from utils.output import render
 
 @dataclass
 class InformationBase:
@@ -11,4 +10,16 @@ class InformationBase:
         """
         Returns a string representation of the Information instance.
         """
+        return render(self)
+
+    def records(self):
+        """
+        Yields the Information instance as a dict.
+        """
+        yield self.__dict__
+
+    def text(self):
+        """
+        Returns a human readable representation of the Information instance.
+        """
         raise NotImplementedError()
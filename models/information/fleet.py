@@ -0,0 +1,169 @@
+from typing import Iterable, Tuple
+
+import numpy as np
+
+from .metrics import SignalMetrics
+
+
+class FleetSignalTable:
+    """
+    Represents the radio metrics of many routers as NumPy columns.
+
+    Every metric is a float64 column where missing readings are NaN, so the
+    statistics below run vectorized over the whole fleet.
+
+    Attributes:
+        routers (ndarray): The router identifiers.
+        values (ndarray): One row per router and one column per metric of `METRICS`.
+        cell_id (ndarray): The cell ID of each router.
+        band (ndarray): The band of each router.
+        plmn (ndarray): The PLMN of each router.
+    """
+
+    METRICS = ('rsrp', 'rsrq', 'rssi', 'sinr', 'txpower')
+    KEYS = ('cell_id', 'band', 'plmn')
+
+    def __init__(self, routers, values, cell_id, band, plmn):
+        self.routers = np.asarray(routers, dtype=object)
+        self.values = np.asarray(values, dtype=np.float64).reshape(len(self.routers), len(self.METRICS))
+        self.cell_id = np.asarray(cell_id, dtype=object)
+        self.band = np.asarray(band, dtype=object)
+        self.plmn = np.asarray(plmn, dtype=object)
+
+    def __len__(self):
+        return len(self.routers)
+
+    @staticmethod
+    def from_metrics(items: Iterable[Tuple[str, SignalMetrics]]):
+        """
+        Builds a table from parsed metrics.
+
+        Args:
+            items (Iterable[tuple[str, SignalMetrics]]): (router identifier, metrics) pairs.
+
+        Returns:
+            FleetSignalTable: The table.
+        """
+        items = list(items)
+        nan = float('nan')
+        return FleetSignalTable(
+            routers=[router for router, _ in items],
+            values=[
+                [nan if getattr(m, metric) is None else getattr(m, metric) for metric in FleetSignalTable.METRICS]
+                for _, m in items
+            ],
+            cell_id=[m.cell_id for _, m in items],
+            band=[m.band for _, m in items],
+            plmn=[m.plmn for _, m in items],
+        )
+
+    def column(self, metric):
+        """ Get the column of a metric. """
+        return self.values[:, self.METRICS.index(metric)]
+
+    def percentiles(self, metric, q=(5, 25, 50, 75, 95)):
+        """
+        Computes percentiles of a metric over the fleet, ignoring missing readings.
+
+        Args:
+            metric (str): One of `METRICS`.
+            q (tuple[float]): The percentiles to compute.
+
+        Returns:
+            dict[float, float]: The value of each percentile.
+        """
+        column = self.column(metric)
+        column = column[~np.isnan(column)]
+        if not column.size:
+            return {p: float('nan') for p in q}
+        return dict(zip(q, np.percentile(column, q).tolist()))
+
+    def group_by(self, key, metric):
+        """
+        Summarizes a metric per cell, band or PLMN.
+
+        Args:
+            key (str): One of `KEYS`.
+            metric (str): One of `METRICS`.
+
+        Returns:
+            dict[str, dict]: The router count, mean, median, minimum and maximum of each group.
+        """
+        labels, inverse = np.unique(getattr(self, key).astype(str), return_inverse=True)
+        column = self.column(metric)
+        valid = ~np.isnan(column)
+
+        counts = np.bincount(inverse, minlength=len(labels))
+        valid_counts = np.bincount(inverse[valid], minlength=len(labels))
+        sums = np.bincount(inverse[valid], weights=column[valid], minlength=len(labels))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = sums / valid_counts
+
+        # Sorting by group then value lays every group out contiguously for the medians and extremes.
+        order = np.lexsort((column[valid], inverse[valid]))
+        sorted_values = column[valid][order]
+        bounds = np.concatenate(([0], np.cumsum(valid_counts)))
+
+        summary = {}
+        for i, label in enumerate(labels):
+            group = sorted_values[bounds[i]:bounds[i + 1]]
+            summary[str(label)] = {
+                'routers': int(counts[i]),
+                'mean': float(means[i]),
+                'median': float(np.median(group)) if group.size else float('nan'),
+                'min': float(group[0]) if group.size else float('nan'),
+                'max': float(group[-1]) if group.size else float('nan'),
+            }
+        return summary
+
+    def outliers(self, metric, threshold=3.5, key=None):
+        """
+        Finds the routers whose metric is far from the rest of the fleet.
+
+        Uses the modified z-score (based on the median absolute deviation), which
+        is not skewed by the outliers themselves.
+
+        Args:
+            metric (str): One of `METRICS`.
+            threshold (float): The modified z-score above which a router is an outlier.
+            key (str): Compare routers within the same cell, band or PLMN instead of fleet-wide.
+
+        Returns:
+            list[tuple[str, float]]: The (router, value) pairs of the outliers.
+        """
+        column = self.column(metric)
+        if key is None:
+            inverse = np.zeros(len(self), dtype=np.intp)
+        else:
+            _, inverse = np.unique(getattr(self, key).astype(str), return_inverse=True)
+
+        scores = np.zeros(len(self))
+        for group in np.unique(inverse):
+            mask = (inverse == group) & ~np.isnan(column)
+            if not mask.any():
+                continue
+            values = column[mask]
+            median = np.median(values)
+            mad = np.median(np.abs(values - median))
+            if mad:
+                scores[mask] = 0.6745 * np.abs(values - median) / mad
+
+        indexes = np.flatnonzero(scores > threshold)
+        return [(self.routers[i], float(column[i])) for i in indexes]
+
+    def rank(self, metric='sinr', descending=True, limit=None):
+        """
+        Ranks the routers by a metric, routers without a reading come last.
+
+        Args:
+            metric (str): One of `METRICS`.
+            descending (bool): Best first for metrics where higher is better.
+            limit (int): Return the first `limit` routers only.
+
+        Returns:
+            list[tuple[str, float]]: The (router, value) pairs in order.
+        """
+        column = self.column(metric)
+        keys = np.where(np.isnan(column), np.inf, -column if descending else column)
+        order = np.argsort(keys, kind='stable')[:limit]
+        return [(self.routers[i], float(column[i])) for i in order]
@@ -0,0 +1,75 @@
+import re
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+
+_NUMBER = re.compile(r'[-+]?\d+(?:\.\d+)?')
+
+
+def parse_quantity(value) -> Optional[float]:
+    """
+    Extract the number of a raw router value such as "-95dBm" or ">=-51dBm".
+
+    When the value holds several numbers, like the "PPusch:23dBm PPucch:7dBm"
+    transmit power, the first one is returned.
+
+    Args:
+        value (str): The raw value.
+
+    Returns:
+        float | None: The number, or None if the value holds none.
+    """
+    if not value:
+        return None
+    match = _NUMBER.search(value)
+    return float(match.group()) if match else None
+
+
+@dataclass
+class SignalMetrics:
+    """
+    Represents the radio metrics of a router as numbers.
+
+    Attributes:
+        rsrp (float): The RSRP in dBm.
+        rsrq (float): The RSRQ in dB.
+        rssi (float): The RSSI in dBm.
+        sinr (float): The SINR in dB.
+        txpower (float): The uplink (PUSCH) transmit power in dBm.
+        cqi (tuple[int]): The CQI of each codeword.
+        cell_id (str): The cell ID.
+        band (str): The band.
+        plmn (str): The PLMN.
+    """
+    rsrp: Optional[float]
+    rsrq: Optional[float]
+    rssi: Optional[float]
+    sinr: Optional[float]
+    txpower: Optional[float]
+    cqi: Tuple[int, ...]
+    cell_id: str
+    band: str
+    plmn: str
+
+    @staticmethod
+    def from_information(information):
+        """
+        Parses the raw radio fields of a router information.
+
+        Args:
+            information (FlyboxInformation): The router information.
+
+        Returns:
+            SignalMetrics: The parsed metrics.
+        """
+        return SignalMetrics(
+            rsrp=parse_quantity(information.rsrp),
+            rsrq=parse_quantity(information.rsrq),
+            rssi=parse_quantity(information.rssi),
+            sinr=parse_quantity(information.sinr),
+            txpower=parse_quantity(information.wireless_transmit_power),
+            cqi=tuple(int(value) for value in information.cqi.split() if value.lstrip('-').isdigit()),
+            cell_id=information.cell_id,
+            band=information.band,
+            plmn=information.plmn,
+        )
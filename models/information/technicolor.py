@@ -1,10 +1,11 @@
 
 
-import json
+from dataclasses import dataclass
+
 from models.information.base import InformationBase
-from utils import settings
 
 
+@dataclass
 class TechnicolorInformation(InformationBase):
     """ Represents the information of a Technicolor router. 
     Attributes:
@@ -17,11 +18,10 @@ class TechnicolorInformation(InformationBase):
     serial_number: str
     software_version: str
 
-    def __str__(self):
+    def text(self):
         """
-        Returns a string representation of the FlyboxInformation instance.
+        Returns a human readable representation of the TechnicolorInformation instance.
         """
-        return json.dumps(self.__dict__) if settings.AS_JSON else \
-                f"Device Name:                   {self.device_name}\n" \
+        return f"Device Name:                   {self.device_name}\n" \
                 f"Serial Number:                 {self.serial_number}\n" \
-                f"Software Version:              {self.software_version}\n"
\ No newline at end of file
+                f"Software Version:              {self.software_version}"
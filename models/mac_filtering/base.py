@@ -1,12 +1,9 @@
 
 from dataclasses import dataclass
-import json
 from typing import List
 
-import pandas as pd
-
 from models.user_device.base import UserDeviceBase
-from utils import settings
+from utils.output import render
 
 
 @dataclass
@@ -36,15 +33,18 @@ class MacFilteringSsidCollection:
     Attributes:
         devices (list): A list of user devices.
     """
+    many = True
 
     def __init__(self, ssids=[]):
         self.ssids: List[MacFilteringBase] = ssids
 
-    def display(self):
-        """ Display the user devices. """
-        if settings.AS_JSON:
-            return json.dumps([[ssid.__dict__ for ssid in self.ssids]])
+    def records(self):
+        """ Yield the MAC filters of each SSID as dicts, one at a time. """
+        for ssid in self.ssids:
+            yield ssid.__dict__
 
+    def text(self):
+        """ Format the non-empty MAC filters. """
         return "\n\n".join([
             f"SSID: {ssid.ssid}\n"
             f"Blacklisted users:\n"
@@ -53,3 +53,7 @@ class MacFilteringSsidCollection:
             + '\n'.join([f"  {user.name}\t {user.mac_address}" for user in ssid.whitelisted_users])
             for ssid in self.ssids if len(ssid.blacklisted_users) or len(ssid.whitelisted_users)
         ])
+
+    def display(self, fmt=None):
+        """ Display the user devices. """
+        return render(self, fmt)
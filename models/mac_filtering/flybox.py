@@ -1,5 +1,4 @@
 from dataclasses import dataclass
-import xml.etree.ElementTree as ET
 
 
 from models.mac_filtering.base import MacFilteringBase
@@ -10,7 +9,7 @@ class MacFilteringFlybox(MacFilteringBase):
     """MacFiltering class for Flybox."""
     
     @staticmethod
-    def from_xml(ssid: ET.Element):
+    def from_xml(ssid):
         """Parse XML response from router."""
 
         table = MacFilteringFlybox(
@@ -19,13 +18,19 @@ class MacFilteringFlybox(MacFilteringBase):
             whitelisted_users=[]
         )
 
+        # Host names are looked up once instead of searching the SSID for every address
+        hostnames = {}
+        for item in ssid.iter():
+            if isinstance(item.tag, str) and item.tag.startswith('wifihostname'):
+                hostnames.setdefault(item.tag, item.text)
+
         for wifimacblacklist in ssid.findall('.//wifimacblacklist'):
             for item in wifimacblacklist:
-                if item.tag.startswith('WifiMacFilterMac'):
+                if isinstance(item.tag, str) and item.tag.startswith('WifiMacFilterMac'):
                     index = item.tag.replace('WifiMacFilterMac', '')
                     table.blacklisted_users.append(
                         UserDeviceBase(
-                            name=ssid.find(f'.//wifihostname{index}').text,
+                            name=hostnames.get(f'wifihostname{index}'),
                             mac_address=item.text,
                             ip_address='',
                             interface='',
@@ -37,11 +42,11 @@ class MacFilteringFlybox(MacFilteringBase):
 
         for wifimacwhitelist in ssid.findall('.//wifimacwhitelist'):
             for item in wifimacwhitelist:
-                if item.tag.startswith('WifiMacFilterMac'):
+                if isinstance(item.tag, str) and item.tag.startswith('WifiMacFilterMac'):
                     index = item.tag.replace('WifiMacFilterMac', '')
                     table.whitelisted_users.append(
                         UserDeviceBase(
-                            name=ssid.find(f'.//wifihostname{index}').text,
+                            name=hostnames.get(f'wifihostname{index}'),
                             mac_address=item.text,
                             ip_address='',
                             interface='',
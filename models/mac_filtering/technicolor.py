@@ -0,0 +1,37 @@
+from dataclasses import dataclass
+
+
+from models.mac_filtering.base import MacFilteringBase
+from models.user_device.base import UserDeviceBase
+
+@dataclass
+class MacFilteringTechnicolor(MacFilteringBase):
+    """MacFiltering class for Technicolor."""
+
+    @staticmethod
+    def from_rows(ssid, mode, rows):
+        """Build the table of an SSID from the parsed (name, mac address) rows.
+
+        Args:
+            ssid (int): The SSID index.
+            mode (str): The filtering mode, 'deny' lists blacklisted users, 'allow' whitelisted ones.
+            rows (list[tuple[str, str]]): The (name, mac address) pairs of the filter table.
+        """
+
+        users = [
+            UserDeviceBase(
+                name=name,
+                mac_address=mac_address,
+                ip_address='',
+                interface='',
+                uptime='',
+                active=False,
+                is_local=False,
+            ) for name, mac_address in rows
+        ]
+
+        return MacFilteringTechnicolor(
+            ssid=ssid,
+            blacklisted_users=users if mode == 'deny' else [],
+            whitelisted_users=users if mode == 'allow' else [],
+        )
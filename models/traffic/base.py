@@ -0,0 +1,77 @@
+from dataclasses import dataclass
+
+from utils.output import render
+
+
+@dataclass
+class TrafficStatisticsBase:
+    """ Represents the traffic counters of a router.
+
+    Attributes:
+        current_connect_time (int): The duration of the current connection, in seconds.
+        current_upload (int): The bytes uploaded during the current connection.
+        current_download (int): The bytes downloaded during the current connection.
+        current_upload_rate (int): The upload rate reported by the router, in bytes per second.
+        current_download_rate (int): The download rate reported by the router, in bytes per second.
+        total_upload (int): The bytes uploaded since the counters were cleared.
+        total_download (int): The bytes downloaded since the counters were cleared.
+        total_connect_time (int): The connection time since the counters were cleared, in seconds.
+    """
+
+    current_connect_time: int
+    current_upload: int
+    current_download: int
+    current_upload_rate: int
+    current_download_rate: int
+    total_upload: int
+    total_download: int
+    total_connect_time: int
+
+    def __str__(self):
+        return render(self)
+
+    def records(self):
+        """ Yields the traffic counters as a dict. """
+        yield self.__dict__
+
+    def text(self):
+        """ Returns a human readable representation of the traffic counters. """
+        return f"Current Connect Time:          {self.current_connect_time} s\n" \
+                f"Current Upload:                {self.current_upload} B\n" \
+                f"Current Download:              {self.current_download} B\n" \
+                f"Current Upload Rate:           {self.current_upload_rate} B/s\n" \
+                f"Current Download Rate:         {self.current_download_rate} B/s\n" \
+                f"Total Upload:                  {self.total_upload} B\n" \
+                f"Total Download:                {self.total_download} B\n" \
+                f"Total Connect Time:            {self.total_connect_time} s"
+
+
+@dataclass
+class MonthStatisticsBase:
+    """ Represents the traffic of a router during the current month.
+
+    Attributes:
+        current_month_upload (int): The bytes uploaded this month.
+        current_month_download (int): The bytes downloaded this month.
+        month_duration (int): The connection time this month, in seconds.
+        month_last_clear_time (str): The date the monthly counters were last cleared.
+    """
+
+    current_month_upload: int
+    current_month_download: int
+    month_duration: int
+    month_last_clear_time: str
+
+    def __str__(self):
+        return render(self)
+
+    def records(self):
+        """ Yields the monthly counters as a dict. """
+        yield self.__dict__
+
+    def text(self):
+        """ Returns a human readable representation of the monthly counters. """
+        return f"Current Month Upload:          {self.current_month_upload} B\n" \
+                f"Current Month Download:        {self.current_month_download} B\n" \
+                f"Month Duration:                {self.month_duration} s\n" \
+                f"Month Last Clear Time:         {self.month_last_clear_time}"
@@ -0,0 +1,68 @@
+from dataclasses import dataclass
+
+from utils.xml import children_text, is_element, leaves
+
+from .base import MonthStatisticsBase, TrafficStatisticsBase
+
+
+def _values(xml):
+    return children_text(xml) if is_element(xml) else leaves(xml)
+
+
+def _int(values, tag):
+    text = values.get(tag)
+    return int(text) if text and text.isdigit() else 0
+
+
+@dataclass
+class FlyboxTrafficStatistics(TrafficStatisticsBase):
+    """ Represents the traffic counters of a Flybox router. """
+
+    @staticmethod
+    def from_xml_string(xml):
+        """
+        Creates an instance of FlyboxTrafficStatistics from the given XML string.
+
+        Args:
+            xml (bytes | str | Element): The XML string/element of /api/monitoring/traffic-statistics.
+
+        Returns:
+            FlyboxTrafficStatistics: The parsed counters, missing ones are 0.
+        """
+        root = _values(xml)
+
+        return FlyboxTrafficStatistics(
+            current_connect_time=_int(root, 'CurrentConnectTime'),
+            current_upload=_int(root, 'CurrentUpload'),
+            current_download=_int(root, 'CurrentDownload'),
+            current_upload_rate=_int(root, 'CurrentUploadRate'),
+            current_download_rate=_int(root, 'CurrentDownloadRate'),
+            total_upload=_int(root, 'TotalUpload'),
+            total_download=_int(root, 'TotalDownload'),
+            total_connect_time=_int(root, 'TotalConnectTime'),
+        )
+
+
+@dataclass
+class FlyboxMonthStatistics(MonthStatisticsBase):
+    """ Represents the monthly traffic of a Flybox router. """
+
+    @staticmethod
+    def from_xml_string(xml):
+        """
+        Creates an instance of FlyboxMonthStatistics from the given XML string.
+
+        Args:
+            xml (bytes | str | Element): The XML string/element of /api/monitoring/month_statistics.
+
+        Returns:
+            FlyboxMonthStatistics: The parsed counters, missing ones are 0.
+        """
+        root = _values(xml)
+
+        return FlyboxMonthStatistics(
+            current_month_upload=_int(root, 'CurrentMonthUpload'),
+            current_month_download=_int(root, 'CurrentMonthDownload'),
+            month_duration=_int(root, 'MonthDuration'),
+            month_last_clear_time=root.get('MonthLastClearTime') or '',
+        )
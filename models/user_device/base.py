@@ -1,11 +1,10 @@
 
 from dataclasses import dataclass
-import json
 from typing import List
 
 import pandas as pd
 
-from utils import settings
+from utils.output import is_structured, render
 
 
 @dataclass
@@ -37,6 +36,8 @@ class UserDeviceBaseCollection:
     Attributes:
         devices (list): A list of user devices.
     """
+    many = True
+
     def __init__(self, devices=[]):
         self.devices: List[UserDeviceBase] = devices
 
@@ -71,21 +72,28 @@ class UserDeviceBaseCollection:
         """ Display the inactive user devices as JSON. """
         return [d for d in self.devices if not d.active]
     
-    def display_active(self):
+    def display_active(self, fmt=None):
         """ Display the active user devices. """
-        return self.display_active_as_json() if settings.AS_JSON else self.display_active_as_dataframe()
+        return self.display_active_as_json() if is_structured(fmt) else self.display_active_as_dataframe()
     
-    def display_inactive(self):
+    def display_inactive(self, fmt=None):
         """ Display the inactive user devices. """
-        return self.display_inactive_as_json() if settings.AS_JSON else self.display_inactive_as_dataframe()
-        
-    def display(self, include_inactive=False):
-        """ Display the user devices. """
-        devices = [d for d in self.devices if include_inactive or d.active]
-        if settings.AS_JSON:
-            return json.dumps([d.__dict__ for d in devices])
-        
+        return self.display_inactive_as_json() if is_structured(fmt) else self.display_inactive_as_dataframe()
+
+    def records(self, include_inactive=False):
+        """ Yield the user devices as dicts, one at a time. """
+        for d in self.devices:
+            if include_inactive or d.active:
+                yield d.__dict__
+
+    def text(self, include_inactive=False):
+        """ Format the user devices as tables. """
         if include_inactive:
             return self.display_inactive_as_dataframe().__repr__() \
                 + '\n\nActive devices:\n' \
-                + self.display_active_as_dataframe().__repr__()
\ No newline at end of file
+                + self.display_active_as_dataframe().__repr__()
+        return self.display_active_as_dataframe().__repr__()
+
+    def display(self, include_inactive=False, fmt=None):
+        """ Display the user devices. """
+        return render(self, fmt, include_inactive=include_inactive)
\ No newline at end of file
@@ -1,20 +1,20 @@
-import hashlib
-import hmac
 import json
+import threading
 import traceback
-import xml.etree.ElementTree as ET
-
-import requests
 
 from models.information.flybox import FlyboxInformation
 from models.mac_filtering.base import MacFilteringSsidCollection
 from models.mac_filtering.flybox import MacFilteringFlybox
+from models.traffic.flybox import FlyboxMonthStatistics, FlyboxTrafficStatistics
 from models.user_device.base import UserDeviceBase, UserDeviceBaseCollection
 from routers.router import Router
-from utils import settings
+from routers.session import RouterSession
 from utils.consts import GATEWAY_ERROR, INCOMPATIBLE, LOGIN_FAILED, MANY_LOGIN_ATTEMPTS, RESTARTING, SOMETHING_WRONG, TOKEN_FAILED
 from utils.functions import handle_error, handle_info
-from utils.xml import merge_xml
+from utils.output import is_structured
+from utils.scram import get_scram_engine
+from utils.login_throttle import get_login_coordinator
+from utils.xml import find_text, leaves, parse, records
 
 
 class FlyboxRouter(Router):
@@ -26,10 +26,20 @@ class FlyboxRouter(Router):
         password (str): The password for authentication.
     """
 
+    BACKUP_DOCUMENTS = {
+        'config': '/config/global/config.xml',
+        'macfiltering': '/api/wlan/multi-macfilter-settings-ex',
+        'information': '/api/device/information',
+    }
+
     def __init__(self, username, password):
         super().__init__(username, password)
-        self.sess = requests.session()
+        self.sess = RouterSession()
         self.tokenDictKey = '__requestverificationtoken'
+        self.sess.headers["_responseSource"] = "Browser"
+        self.login_coordinator = get_login_coordinator()
+        # Serializes the logins of the threads sharing the router, reads and writes do not take it.
+        self.login_lock = threading.Lock()
 
     def _retrieve_token(self):
         """
@@ -40,182 +50,136 @@ class FlyboxRouter(Router):
         """
         token_url = f"http://{self.gateway}/api/webserver/token"
         response = self.sess.get(token_url)
-        token = ET.fromstring(response.text).find('token').text[32:]
-        return token
-
-    def _scram_salted_password(self, salt, iterations):
-        """
-        Generate the salted password using the SCRAM mechanism.
-
-        Args:
-            salt (str): The salt value.
-            iterations (int): The number of iterations.
-
-        Returns:
-            str: The salted password.
-        """
-        salted_password = hashlib.pbkdf2_hmac(
-            'sha256',
-            self.password.encode(),
-            bytes.fromhex(salt),
-            iterations,
-            dklen=32
-        )
-        return salted_password.hex()
-
-    def _scram_client_key(self, salt_password):
-        """
-        Generate the client key using the SCRAM mechanism.
-
-        Args:
-            salt_password (str): The salted password.
+        token = find_text(response.content, 'token')
+        return token[32:] if token else None
 
-        Returns:
-            str: The client key.
+    def _write(self, url, xml_data):
         """
-        salt_password = bytes.fromhex(salt_password)
-        client_key = hmac.new("Client Key".encode(),
-                              salt_password, hashlib.sha256).hexdigest()
-        return client_key
+        Post a state-changing request.
 
-    def _xor_hex_strings(self, ckey_hex, csig_hex):
-        """
-        Perform XOR operation between two hexadecimal strings.
+        The one-shot token is taken from the session pool, which the headers of
+        previous responses refill, so a token request is only made when the pool
+        is empty. A token the router rejects is retried once with a fresh one.
+        The lock keeps writes from interleaving with logins.
 
         Args:
-            ckey_hex (str): The first hexadecimal string.
-            csig_hex (str): The second hexadecimal string.
+            url (str): The API URL.
+            xml_data (str): The request body.
 
         Returns:
-            str: The resulting hexadecimal string after XOR operation.
+            Response: The router response.
         """
-        ckey_bytes = self._bytes_to_words((ckey_hex))
-        csig_bytes = self._bytes_to_words((csig_hex))
+        with self.write_lock:
+            token = self.sess.tokens.take(self._retrieve_token)
+            response = self.sess.post(url, data=xml_data, headers={self.tokenDictKey: token})
+            if b'<code>125002</code>' in response.content or b'<code>125003</code>' in response.content:
+                self.sess.tokens.clear()
+                response = self.sess.post(url, data=xml_data, headers={self.tokenDictKey: self._retrieve_token()})
+            return response
 
-        result_bytes = list(a ^ b for a, b in zip(ckey_bytes, csig_bytes))
-        result_hex = self._words_to_bytes(result_bytes).hex()
-
-        return result_hex
+    def is_supported_router(self):
+        try:
+            logout_url = f"http://{self.gateway}/config/global/config.xml"
+            response = self.sess.get(logout_url)
+            return b'<title>Flybox</title>' in response.content
+        except:
+            return False
 
-    def _words_to_bytes(self, words):
-        """
-        Convert a list of words to bytes.
+    def login(self, attempts=3):
+        login_state_url = f"http://{self.gateway}/api/user/state-login"
 
-        Args:
-            words (list): The input list of words.
+        for attempt in range(attempts, -1, -1):
+            response = self.sess.get(login_state_url)
 
-        Returns:
-            bytes: The converted bytes.
-        """
-        byte_array = bytearray()
-        for word in words:
-            # Convert negative word to signed byte representation
-            byte_array.extend(word.to_bytes(4, byteorder='big', signed=True))
-        return bytes(byte_array)
+            if b'<State>0</State>' in response.content:
+                return True, response.text
 
-    def _bytes_to_words(self, byte_array):
+            # Threads sharing the router wait for a single login, then see it logged in
+            # without spending a login attempt.
+            with self.login_lock:
+                response = self.sess.get(login_state_url)
+                if b'<State>0</State>' in response.content:
+                    return True, response.text
+
+                if not self.is_supported_router():
+                    if not is_structured():
+                        print("The router is not a Flybox.")
+                    return INCOMPATIBLE, ''
+
+                # Attempts are rationed per router across processes so a lockout (108007) is never triggered by us.
+                # Waiting for one happens before taking the write lock, which would hold up the writes of the router.
+                if not self.login_coordinator.acquire(self.gateway):
+                    return MANY_LOGIN_ATTEMPTS, ''
+
+                with self.write_lock:
+                    result = self._login(retry=attempt > 0)
+            if result is not None:
+                return result
+
+    def _login(self, retry=False):
         """
-        Convert bytes to a list of words.
+        Make one login attempt, the caller holding the login and write locks and a login attempt.
 
         Args:
-            byte_array (bytes): The input byte array.
+            retry (bool): Whether an unexpected failure is retried by the caller.
 
         Returns:
-            str: The converted list of words.
+            tuple | None: The login result, None if the attempt failed and must be retried.
         """
-        word_size = 4
-        words = []
-
-        for i in range(0, len(byte_array), word_size):
-            word_bytes = byte_array[i:i+word_size]
-            word_value = int.from_bytes(
-                word_bytes, byteorder='big', signed=True)
-            words.append(word_value)
-
-        return words
-
-    def is_supported_router(self):
-        try:
-            logout_url = f"http://{self.gateway}/config/global/config.xml"
-            response = requests.get(logout_url)
-            return "<title>Flybox</title>" in response.text
-        except:
-            return False
-
-    def login(self, attempts=3):
         sess = self.sess
 
-        login_state_url = f"http://{self.gateway}/api/user/state-login"
-        response = self.sess.get(login_state_url)
-
-        if '<State>0</State>' in response.text:
-            return True, response.text
-
-        if not self.is_supported_router():
-            if not settings.AS_JSON:
-                print("The router is not a Flybox.")
-            return INCOMPATIBLE, ''
-
+        # Tokens of a previous session are no longer valid.
+        sess.tokens.clear()
         token = self._retrieve_token()
 
         if not token:
             return TOKEN_FAILED, ''
 
-        sess.headers[self.tokenDictKey] = token
-        sess.headers["_responseSource"] = "Browser"
-
         first_nonce = 'a' * 64
 
         xml_data = f'<?xml version="1.0" encoding="UTF-8"?><request><username>{self.username}</username><firstnonce>{first_nonce}</firstnonce><mode>1</mode></request>'
 
         challenge_url = f"http://{self.gateway}/api/user/challenge_login"
-        response = sess.post(challenge_url, data=xml_data)
+        response = sess.post(challenge_url, data=xml_data, headers={self.tokenDictKey: token})
 
-        if '<code>108007</code>' in response.text:
+        if b'<code>108007</code>' in response.content:
+            self.login_coordinator.record_failure(self.gateway, locked=True)
             return MANY_LOGIN_ATTEMPTS, response.text
         
 
-        sess.headers[self.tokenDictKey] = response.headers[self.tokenDictKey]
+        # The challenge answer carries the token of the next step, harvested by the session.
+        token = sess.tokens.take(self._retrieve_token)
 
         try:
-            response_tree = ET.fromstring(response.text)
+            challenge = leaves(response.content)
 
-            iterations = int(response_tree.find('iterations').text) if response_tree.find(
-                'iterations') is not None else ''
-            final_nonce = response_tree.find('servernonce').text if response_tree.find(
-                'servernonce') is not None else ''
-            salt = response_tree.find('salt').text if response_tree.find(
-                'salt') is not None else ''
+            iterations = int(challenge['iterations']) if 'iterations' in challenge else ''
+            final_nonce = challenge.get('servernonce', '')
+            salt = challenge.get('salt', '')
 
             auth_msg = f"{first_nonce},{final_nonce},{final_nonce}"
 
-            client_key = self._scram_client_key(
-                self._scram_salted_password(salt, iterations))
-
-            storedKey = hashlib.new('sha256')
-            storedKey.update(bytes.fromhex(client_key))
-            storedKey = storedKey.hexdigest()
-
-            signature = hmac.new(auth_msg.encode(), bytes.fromhex(
-                storedKey), hashlib.sha256).hexdigest()
-
-            client_proof = self._xor_hex_strings(
-                bytes.fromhex(client_key), bytes.fromhex(signature))
+            # Derived on the shared pool so that concurrent logins use all the cores.
+            client_proof = get_scram_engine().client_proof(self.password, salt, iterations, auth_msg).result()
 
             xml_data = f'<?xml version: "1.0" encoding="UTF-8"?><request><clientproof>{client_proof}</clientproof><finalnonce>{final_nonce}</finalnonce></request>'
             authentication_url = f"http://{self.gateway}/api/user/authentication_login"
-            response = sess.post(authentication_url, data=xml_data)
+            response = sess.post(authentication_url, data=xml_data, headers={self.tokenDictKey: token})
 
-            if '<serversignature>' in response.text:
+            if b'<serversignature>' in response.content:
+                self.login_coordinator.record_success(self.gateway)
                 return True, response.text
-            elif '<code>108006</code>' in response.text:
+
+            self.login_coordinator.record_failure(self.gateway)
+            if b'<code>108006</code>' in response.content:
                 return LOGIN_FAILED, response.text
             else:
                 return SOMETHING_WRONG, response.text
         except Exception as ex:
-            if attempts > 0:
-                return self.login(attempts - 1)
-            if not settings.AS_JSON:
+            self.login_coordinator.record_failure(self.gateway)
+            if retry:
+                return None
+            if not is_structured():
                 traceback.print_exc()
                 print(
                     'Failed to log in. This is usually caused by multiple logins. Please try again later.'
@@ -224,11 +188,10 @@ class FlyboxRouter(Router):
 
     def logout(self):
         if self.login():
-            self.sess.headers[self.tokenDictKey] = self._retrieve_token()
             xml_data = f'<?xml version: "1.0" encoding="UTF-8"?><request><Logout>1</Logout></request>'
             control_url = f"http://{self.gateway}/api/user/logout"
-            response = self.sess.post(control_url, data=xml_data)
-            success = '<response>OK</response>' not in response.text
+            response = self._write(control_url, xml_data)
+            success = not b'<response>OK</response>' in response.content
             if success:
                 print('Failed to logout', response.text)
             return success
@@ -237,12 +200,11 @@ class FlyboxRouter(Router):
         info_url = f"http://{self.gateway}/api/device/information"
         signal_url = f"http://{self.gateway}/api/device/signal"
 
-        xml = merge_xml(
-            self.sess.get(info_url).text,
-            self.sess.get(signal_url).text,
-        )
+        # Both responses are flat, their fields are scanned and merged without building trees.
+        values = leaves(self.sess.get(signal_url).content)
+        values.update(leaves(self.sess.get(info_url).content))
 
-        return FlyboxInformation.from_xml_string(xml)
+        return FlyboxInformation.from_values(values)
 
     def restart_router(self):
         if not self.gateway:
@@ -250,14 +212,12 @@ class FlyboxRouter(Router):
             return False
 
         if self.login():
-            self.sess.headers[self.tokenDictKey] = self._retrieve_token()
-
             # Restarting ..
             xml_data = f'<?xml version: "1.0" encoding="UTF-8"?><request><Control>1</Control></request>'
             control_url = f"http://{self.gateway}/api/device/control"
-            response = self.sess.post(control_url, data=xml_data)
+            response = self._write(control_url, xml_data)
 
-            success = '<response>OK</response>' in response.text
+            success = b'<response>OK</response>' in response.content
 
             if success:
                 handle_info(RESTARTING)
@@ -277,19 +237,19 @@ class FlyboxRouter(Router):
             control_url = f"http://{self.gateway}/api/lan/HostInfo"
             response = self.sess.get(control_url)
 
-            root = ET.fromstring(response.text)
-
-            devices = [
-                UserDeviceBase(
-                    node.find('ActualName').text,
-                    node.find('IpAddress').text,
-                    node.find('MacAddress').text,
-                    node.find('InterfaceType').text,
-                    24 * 3600 - int(node.find('LeaseTime').text),
-                    node.find('Active').text == '1',
-                    node.find('isLocalDevice').text == '1',
-                ) for node in root.findall('Hosts/Host')
-            ]
+            devices = []
+            for host in records(response.content, 'Host'):
+                # Empty or missing fields are None, as the text of an empty element.
+                lease_time = host.get('LeaseTime')
+                devices.append(UserDeviceBase(
+                    host.get('ActualName') or None,
+                    host.get('IpAddress') or None,
+                    host.get('MacAddress') or None,
+                    host.get('InterfaceType') or None,
+                    24 * 3600 - int(lease_time) if lease_time else None,
+                    host.get('Active') == '1',
+                    host.get('isLocalDevice') == '1',
+                ))
 
             return UserDeviceBaseCollection(devices)
 
@@ -302,7 +262,7 @@ class FlyboxRouter(Router):
             control_url = f"http://{self.gateway}/api/wlan/multi-macfilter-settings-ex"
             response = self.sess.get(control_url)
 
-            root = ET.fromstring(response.text)
+            root = parse(response.content)
 
 
             mac_filters = []
@@ -311,4 +271,34 @@ class FlyboxRouter(Router):
                 table =  MacFilteringFlybox.from_xml(ssid)
                 mac_filters.append(table)
 
-            return MacFilteringSsidCollection(mac_filters)
\ No newline at end of file
+            return MacFilteringSsidCollection(mac_filters)
+
+    def get_traffic_statistics(self):
+        if not self.gateway:
+            handle_error(GATEWAY_ERROR)
+            return False
+
+        if self.login():
+            control_url = f"http://{self.gateway}/api/monitoring/traffic-statistics"
+            response = self.sess.get(control_url)
+
+            return FlyboxTrafficStatistics.from_xml_string(response.content)
+
+    def get_monthly_statistics(self):
+        if not self.gateway:
+            handle_error(GATEWAY_ERROR)
+            return False
+
+        if self.login():
+            control_url = f"http://{self.gateway}/api/monitoring/month_statistics"
+            response = self.sess.get(control_url)
+
+            return FlyboxMonthStatistics.from_xml_string(response.content)
+
+    def fetch_document(self, path, headers=None):
+        if not self.gateway:
+            handle_error(GATEWAY_ERROR)
+            return False
+
+        if self.login():
+            return self.sess.get(f"http://{self.gateway}{path}", headers=headers)
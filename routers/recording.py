@@ -0,0 +1,189 @@
+import base64
+import gzip
+import json
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+
+# Version of the archive format, stored in its first line.
+ARCHIVE_VERSION = 1
+
+REDACTED = 'REDACTED'
+
+# Headers whose values are credentials or one-shot session state.
+REDACTED_HEADERS = ('authorization', 'cookie', 'set-cookie', '__requestverificationtoken')
+
+# Request body fields holding credentials: Flybox XML elements and Technicolor form fields.
+_REDACTED_ELEMENTS = re.compile(rb'<(username|password|clientproof)>[^<]*</\1>')
+_REDACTED_FIELDS = re.compile(rb'(^|&)(user|password)=[^&]*')
+
+# Response elements of a Flybox login that would let a recording be replayed against the real router
+# or the password be attacked offline: the SCRAM challenge and server signature, and the session token.
+_REDACTED_RESPONSE_ELEMENTS = re.compile(rb'<(salt|servernonce|serversignature|token)>([^<]*)</\1>')
+
+
+def _path(url):
+    parts = urlsplit(url)
+    return parts.path + ('?' + parts.query if parts.query else '')
+
+
+def redact_headers(headers):
+    """ Copy headers, with the values of `REDACTED_HEADERS` replaced. """
+    return {
+        name: REDACTED if name.lower().startswith(REDACTED_HEADERS) else value
+        for name, value in headers.items()
+    }
+
+
+def redact_body(body):
+    """ Replace the credentials of a request body. """
+    if not body:
+        return b''
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    body = _REDACTED_ELEMENTS.sub(lambda m: b'<%s>%s</%s>' % (m.group(1), REDACTED.encode(), m.group(1)), body)
+    return _REDACTED_FIELDS.sub(lambda m: m.group(1) + m.group(2) + b'=' + REDACTED.encode(), body)
+
+
+def redact_response(body):
+    """
+    Replace the login secrets of a response body.
+
+    The values become zeros of the same length rather than `REDACTED`, so a
+    replayed login still parses the salt as hex and slices the token as the
+    router's would.
+    """
+    return _REDACTED_RESPONSE_ELEMENTS.sub(
+        lambda m: b'<%s>%s</%s>' % (m.group(1), b'0' * len(m.group(2)), m.group(1)), body
+    )
+
+
+class RecordingAdapter(HTTPAdapter):
+    """
+    A transport that sends requests to the router and records every exchange.
+
+    The archive is gzip-compressed JSON lines: a header line, then one line
+    per exchange with the method, path, redacted request, redacted response
+    and latency. Hosts are not recorded, so a recording replays against any
+    gateway.
+
+    Args:
+        path (str): The archive to write.
+        meta (dict): Extra header fields, e.g. the driver or firmware version.
+    """
+
+    def __init__(self, path, meta=None, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._file = gzip.open(path, 'wt', encoding='utf-8')
+        self._lock = threading.Lock()
+        self._write({'version': ARCHIVE_VERSION, 'created': time.time(), **(meta or {})})
+
+    def _write(self, line):
+        with self._lock:
+            self._file.write(json.dumps(line, separators=(',', ':')) + '\n')
+
+    def send(self, request, **kwargs):
+        start = time.perf_counter()
+        response = super().send(request, **kwargs)
+        latency = time.perf_counter() - start
+        self._write({
+            'method': request.method,
+            'path': _path(request.url),
+            'request_headers': redact_headers(request.headers),
+            'request_body': base64.b64encode(redact_body(request.body)).decode('ascii'),
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': redact_headers(response.headers),
+            'body': base64.b64encode(redact_response(response.content)).decode('ascii'),
+            'latency': round(latency, 6),
+        })
+        return response
+
+    def close(self):
+        super().close()
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def load_archive(path):
+    """
+    Read a recording.
+
+    Args:
+        path (str): The archive.
+
+    Returns:
+        tuple[dict, list[dict]]: The header and the exchanges, in recording order.
+
+    Raises:
+        ValueError: If the archive version is not supported.
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get('version') != ARCHIVE_VERSION:
+            raise ValueError(f"Unsupported recording version: {header.get('version')}")
+        return header, [json.loads(line) for line in f if line.strip()]
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    A transport that answers requests from a recording instead of the network.
+
+    Each (method, path) pair replays its recorded answers in order, and keeps
+    answering with the last one once they are used up, so a recording of one
+    run serves any number of runs. A request that was never recorded raises
+    `requests.ConnectionError`, like an unreachable router.
+
+    Args:
+        path (str): The archive to replay.
+        latency_scale (float): The recorded latencies are slept this many times, 0 to answer immediately.
+    """
+
+    def __init__(self, path, latency_scale=1.0):
+        super().__init__()
+        self.header, exchanges = load_archive(path)
+        self.latency_scale = latency_scale
+        self._exchanges = defaultdict(deque)
+        for exchange in exchanges:
+            self._exchanges[exchange['method'], exchange['path']].append(exchange)
+        self._lock = threading.Lock()
+
+    def _next(self, key):
+        with self._lock:
+            queue = self._exchanges.get(key)
+            if not queue:
+                return None
+            return queue.popleft() if len(queue) > 1 else queue[0]
+
+    def send(self, request, **kwargs):
+        exchange = self._next((request.method, _path(request.url)))
+        if exchange is None:
+            raise requests.ConnectionError(f'{request.method} {_path(request.url)} was not recorded', request=request)
+
+        if self.latency_scale:
+            time.sleep(exchange['latency'] * self.latency_scale)
+
+        response = requests.Response()
+        response.status_code = exchange['status']
+        response.reason = exchange['reason']
+        response.headers = CaseInsensitiveDict(exchange['headers'])
+        response._content = base64.b64decode(exchange['body'])
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(seconds=exchange['latency'])
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
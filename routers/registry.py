@@ -0,0 +1,163 @@
+import importlib
+import json
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from importlib.metadata import entry_points
+
+
+ENTRY_POINT_GROUP = 'router_manager.drivers'
+
+
+@dataclass(frozen=True)
+class DriverSpec:
+    """
+    Lightweight metadata describing a router driver.
+
+    The driver module is only imported by `load`, so a registry can hold any
+    number of specs without paying for their dependencies.
+
+    Attributes:
+        name (str): The driver name.
+        module (str): The module holding the driver class.
+        class_name (str): The name of the `Router` subclass.
+        fingerprint_path (str): The path fetched on the gateway to recognise the router.
+        fingerprint (str): The text the fingerprint page contains on supported routers.
+        experimental (bool): True if some endpoints of the driver were never checked against a device.
+    """
+    name: str
+    module: str
+    class_name: str
+    fingerprint_path: str
+    fingerprint: str
+    experimental: bool = False
+
+    def load(self):
+        """
+        Import the driver module.
+
+        Returns:
+            type: The driver class.
+        """
+        return getattr(importlib.import_module(self.module), self.class_name)
+
+    def matches(self, gateway, timeout=3):
+        """
+        Check whether the router behind the gateway is supported by the driver.
+
+        Args:
+            gateway (str): The gateway IP address.
+            timeout (float): The request timeout in seconds.
+
+        Returns:
+            bool: True if the fingerprint page contains the fingerprint.
+        """
+        try:
+            with urllib.request.urlopen(f"http://{gateway}{self.fingerprint_path}", timeout=timeout) as response:
+                body = response.read()
+        except urllib.error.HTTPError as ex:
+            body = ex.read()
+        except (OSError, ValueError):
+            return False
+        return self.fingerprint.encode() in body
+
+
+BUILTIN_DRIVERS = (
+    DriverSpec(
+        name='flybox',
+        module='routers.flybox',
+        class_name='FlyboxRouter',
+        fingerprint_path='/config/global/config.xml',
+        fingerprint='<title>Flybox</title>',
+    ),
+    DriverSpec(
+        name='technicolor',
+        module='routers.technicolor',
+        class_name='TechnicolorRouter',
+        fingerprint_path='/Wizard/ge_login.cgi',
+        fingerprint='<p id="productName" class="product"> Technicolor',
+        experimental=True,
+    ),
+)
+
+
+class DriverRegistry:
+    """
+    A registry of router drivers, keyed by name.
+
+    Args:
+        specs (Iterable[DriverSpec]): The initial drivers.
+    """
+
+    def __init__(self, specs=()):
+        self.specs = {}
+        for spec in specs:
+            self.register(spec)
+
+    def __iter__(self):
+        return iter(self.specs.values())
+
+    def __len__(self):
+        return len(self.specs)
+
+    def register(self, spec: DriverSpec):
+        """ Add a driver, replacing any driver registered under the same name. """
+        self.specs[spec.name] = spec
+
+    def get(self, name):
+        """
+        Get a driver by name.
+
+        Raises:
+            KeyError: If no driver is registered under that name.
+        """
+        return self.specs[name]
+
+    def load_entry_points(self, group=ENTRY_POINT_GROUP):
+        """
+        Register the drivers advertised by installed packages.
+
+        Each entry point must reference a `DriverSpec` instance, not the driver
+        class itself, so that only the spec module is imported here.
+        """
+        for entry_point in entry_points(group=group):
+            self.register(entry_point.load())
+
+    def load_config(self, path):
+        """
+        Register the drivers listed in a JSON file.
+
+        The file holds a list of objects with the fields of `DriverSpec`.
+        """
+        with open(path, encoding='utf-8') as file:
+            for fields in json.load(file):
+                self.register(DriverSpec(**fields))
+
+    def detect(self, gateway, timeout=3):
+        """
+        Yield the drivers whose fingerprint matches the router behind the gateway.
+
+        Args:
+            gateway (str): The gateway IP address.
+            timeout (float): The timeout of each fingerprint request in seconds.
+        """
+        for spec in self:
+            if spec.matches(gateway, timeout):
+                yield spec
+
+
+def default_registry(config_path=None):
+    """
+    Build the registry of the built-in, installed and configured drivers.
+
+    Args:
+        config_path (str): An optional JSON file of extra drivers.
+
+    Returns:
+        DriverRegistry: The registry.
+    """
+    registry = DriverRegistry(BUILTIN_DRIVERS)
+    registry.load_entry_points()
+    if config_path:
+        registry.load_config(config_path)
+    return registry
@@ -1,3 +1,5 @@
+import threading
+
 from utils.network import get_gateway_ip
 
 
@@ -13,9 +15,14 @@ class Router:
         gateway (str): The gateway IP address of the router.
         username (str): The username for authentication.
         password (str): The password for authentication.
+        write_lock (RLock): Serializes logins and the requests that change the router,
+            reads do not take it so they can run in parallel from many threads.
 
     """
 
+    # The configuration and settings documents saved by a backup, by name and path.
+    BACKUP_DOCUMENTS = {}
+
     def __init__(self, username, password):
         """
         Initialize a new Router object.
@@ -27,6 +34,7 @@ class Router:
         self.gateway = get_gateway_ip()
         self.username = username
         self.password = password
+        self.write_lock = threading.RLock()
 
     def login(self) -> bool:
         """
@@ -141,4 +149,68 @@ class Router:
             NotImplementedError: If the method is not implemented in the derived class.
 
         """
-        raise NotImplementedError("get_mac_filters method must be implemented in derived classes")
\ No newline at end of file
+        raise NotImplementedError("get_mac_filters method must be implemented in derived classes")
+
+    def get_traffic_statistics(self):
+        """
+        Get the traffic counters.
+
+        This method should be implemented in derived classes to provide
+        router-specific functionality to retrieve the traffic counters.
+
+        Returns:
+            TrafficStatisticsBase: The cumulative traffic counters of the router.
+
+        Raises:
+            NotImplementedError: If the method is not implemented in the derived class.
+
+        """
+        raise NotImplementedError("get_traffic_statistics method must be implemented in derived classes")
+
+    def get_monthly_statistics(self):
+        """
+        Get the traffic of the current month.
+
+        This method should be implemented in derived classes to provide
+        router-specific functionality to retrieve the monthly traffic.
+
+        Returns:
+            MonthStatisticsBase: The monthly traffic counters of the router.
+
+        Raises:
+            NotImplementedError: If the method is not implemented in the derived class.
+
+        """
+        raise NotImplementedError("get_monthly_statistics method must be implemented in derived classes")
+
+    def implements(self, method):
+        """
+        Check whether the router class implements a method of this interface.
+
+        Args:
+            method (str): The method name, e.g. 'get_traffic_statistics'.
+
+        Returns:
+            bool: False if the method is the one of this base class, which raises NotImplementedError.
+        """
+        return getattr(type(self), method) is not getattr(Router, method)
+
+    def fetch_document(self, path, headers=None):
+        """
+        Download a raw document from the router.
+
+        This method should be implemented in derived classes to provide
+        router-specific functionality to download the `BACKUP_DOCUMENTS`.
+
+        Args:
+            path (str): The document path, see `BACKUP_DOCUMENTS`.
+            headers (dict): Extra request headers, such as conditional request headers.
+
+        Returns:
+            Response: The HTTP response, 304 when a conditional request found the document unchanged.
+
+        Raises:
+            NotImplementedError: If the method is not implemented in the derived class.
+
+        """
+        raise NotImplementedError("fetch_document method must be implemented in derived classes")
@@ -0,0 +1,119 @@
+import threading
+from collections import deque
+
+import requests
+
+from routers.recording import RecordingAdapter, ReplayAdapter
+from utils import settings
+
+
+# Prefix of the response headers carrying verification tokens, e.g. __RequestVerificationTokenone.
+TOKEN_HEADER_PREFIX = '__requestverificationtoken'
+
+
+class TokenPool:
+    """
+    A small pool of one-shot verification tokens.
+
+    Routers hand out fresh tokens in the headers of their responses, several
+    at a time after a login. Keeping them saves the token request that would
+    otherwise precede every write. Tokens are handed out in the order the
+    router issued them (e.g. __RequestVerificationTokenone before ...two), and
+    the oldest are dropped when the pool is full, as routers expire them first.
+
+    Args:
+        size (int): The maximum number of tokens kept.
+    """
+
+    def __init__(self, size=8):
+        self._tokens = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._tokens)
+
+    def add(self, value):
+        """ Add the tokens of a header value, several tokens are separated by '#'. """
+        tokens = [token for token in value.split('#') if token]
+        with self._lock:
+            for token in tokens:
+                if token not in self._tokens:
+                    self._tokens.append(token)
+
+    def harvest(self, headers):
+        """ Add the tokens of every token header of a response. """
+        for name, value in headers.items():
+            if name.lower().startswith(TOKEN_HEADER_PREFIX):
+                self.add(value)
+
+    def take(self, refill=None):
+        """
+        Take a token out of the pool.
+
+        Args:
+            refill (Callable): Fetches a token from the router when the pool is empty.
+
+        Returns:
+            str | None: The token, None if the pool is empty and there is no refill.
+        """
+        with self._lock:
+            if self._tokens:
+                return self._tokens.popleft()
+        return refill() if refill else None
+
+    def clear(self):
+        """ Drop every token, after a login or when the router rejected one. """
+        with self._lock:
+            self._tokens.clear()
+
+
+class RouterSession(requests.Session):
+    """
+    A requests session for talking to a router.
+
+    Every request gets a timeout unless one is given explicitly, so an
+    unreachable router fails fast instead of blocking its caller. The
+    verification tokens of every response are collected into `tokens`.
+
+    Args:
+        timeout (float): The default timeout in seconds, defaults to `settings.REQUEST_TIMEOUT`.
+    """
+
+    def __init__(self, timeout=None):
+        super().__init__()
+        self.timeout = settings.REQUEST_TIMEOUT if timeout is None else timeout
+        self.tokens = TokenPool()
+        self.hooks['response'].append(self._harvest_tokens)
+
+    def _harvest_tokens(self, response, *args, **kwargs):
+        self.tokens.harvest(response.headers)
+
+    def record(self, path, meta=None):
+        """
+        Record every exchange of the session into an archive, see `RecordingAdapter`.
+
+        The archive is complete once the session is closed.
+
+        Args:
+            path (str): The archive to write.
+            meta (dict): Extra fields of the archive header.
+        """
+        adapter = RecordingAdapter(path, meta)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+
+    def replay(self, path, latency_scale=1.0):
+        """
+        Answer the requests of the session from an archive instead of the network, see `ReplayAdapter`.
+
+        Args:
+            path (str): The archive to replay.
+            latency_scale (float): The factor applied to the recorded latencies.
+        """
+        adapter = ReplayAdapter(path, latency_scale)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
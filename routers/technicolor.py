@@ -1,52 +1,123 @@
 
+import html
 import re
+from itertools import islice
 import traceback
 import requests
 from models.information.technicolor import TechnicolorInformation
+from models.mac_filtering.base import MacFilteringSsidCollection
+from models.mac_filtering.technicolor import MacFilteringTechnicolor
+from models.user_device.base import UserDeviceBase, UserDeviceBaseCollection
 from routers.router import Router
-from utils import settings
-from utils.consts import INCOMPATIBLE, SOMETHING_WRONG
+from routers.session import RouterSession
+from utils.consts import GATEWAY_ERROR, INCOMPATIBLE, LOGIN_FAILED, SOMETHING_WRONG
+from utils.functions import handle_error
+from utils.output import is_structured
 
-from bs4 import BeautifulSoup as bs
+
+_TAG = re.compile(r'<[^>]+>')
+_INFO_CELL = re.compile(r'<td[^>]*\bcolspan=["\']?3["\']?[^>]*>(.*?)</td>', re.S | re.I)
+_MAC = r'(?:[0-9A-Fa-f]{2}[:-]){5}[0-9A-Fa-f]{2}'
+# Cell contents never span another cell or row, so a match cannot swallow neighbouring rows.
+_CELL = r'<td[^>]*>(?P<{}>(?:(?!</?t[dr][\s>]).)*?)</td>\s*'
+_MAC_CELL = rf'<td[^>]*>\s*(?P<mac>{_MAC})\s*</td>\s*'
+_DEVICE_ROW = re.compile(
+    r'<tr[^>]*>\s*'
+    + _CELL.format('name')
+    + _CELL.format('ip')
+    + _MAC_CELL
+    + _CELL.format('interface')
+    + _CELL.format('status'),
+    re.S | re.I
+)
+_MAC_FILTER_ROW = re.compile(
+    r'<tr[^>]*>\s*'
+    + _CELL.format('name')
+    + _MAC_CELL,
+    re.S | re.I
+)
+_MAC_FILTER_MODE = re.compile(
+    r'<select[^>]*name=["\']?macFilterMode["\']?[^>]*>.*?'
+    r'<option[^>]*value=["\']?(?P<mode>\w+)["\']?[^>]*\bselected\b',
+    re.S | re.I
+)
+
+
+def _text(cell):
+    """ Strip the tags and entities of an HTML cell. """
+    return html.unescape(_TAG.sub('', cell)).strip()
 
 
 class TechnicolorRouter(Router):
-        
+    """
+    A class for performing actions on Technicolor router.
+
+    Pages are parsed with precompiled regular expressions that only match the
+    needed cells, in a single pass over the response.
+
+    Only the login and information pages have been checked against a device.
+    The devices and MAC filter pages, their URLs and their column layouts
+    follow the Wizard layout of the information page and are not verified
+    yet, so the driver is registered as experimental. Restarting is not
+    implemented until its page is captured from a device.
+
+    Args:
+        username (str): The username for authentication.
+        password (str): The password for authentication.
+    """
+
+    LOGIN_URL = "/Wizard/ge_login.cgi"
+    INFORMATION_URL = "/Wizard/ge_gateway.cgi?be=0&l0=1&l1=0&pageAct=info"
+    DEVICES_URL = "/Wizard/ge_gateway.cgi?be=0&l0=1&l1=1&pageAct=devices"
+    MAC_FILTER_URL = "/Wizard/ge_wireless.cgi?be=0&l0=2&l1=3&pageAct=macfilter"
+
+    BACKUP_DOCUMENTS = {
+        'information': INFORMATION_URL,
+        'devices': DEVICES_URL,
+        'macfiltering': MAC_FILTER_URL,
+    }
+
     def __init__(self, username, password):
         super().__init__(username, password)
-        self.sess = requests.session()
+        self.sess = RouterSession()
+        self._supported = None
 
     def is_supported_router(self):
-        login_state_url = f"http://{self.gateway}/Wizard/ge_login.cgi"
-        html = self.sess.get(login_state_url).text
-        return '<p id="productName" class="product"> Technicolor' in html
-        
-    
+        # The answer cannot change for a given gateway, so the login page is fetched once.
+        if self._supported is None:
+            try:
+                html_text = self.sess.get(f"http://{self.gateway}{self.LOGIN_URL}").text
+                self._supported = '<p id="productName" class="product"> Technicolor' in html_text
+            except requests.RequestException:
+                return False
+        return self._supported
+
     def login(self, attempts=3):
 
-        login_state_url = f"http://{self.gateway}/Wizard/ge_login.cgi"
+        login_state_url = f"http://{self.gateway}{self.LOGIN_URL}"
 
         if not self.is_supported_router():
-            if not settings.AS_JSON:
-                print("The router is not a Flybox.")
+            if not is_structured():
+                print("The router is not a Technicolor.")
             return INCOMPATIBLE, ''
 
         try:
-            response = self.sess.post(login_state_url, {
-                'user': self.username,
-                'password': self.password,
-                'isSubmit': '1',
-            })
+            with self.write_lock:
+                response = self.sess.post(login_state_url, {
+                    'user': self.username,
+                    'password': self.password,
+                    'isSubmit': '1',
+                })
 
             if 'Set-Cookie' in response.headers:
-                return True, response
-            
-            return False, response
+                return True, response.text
+
+            return LOGIN_FAILED, response.text
 
         except Exception as ex:
             if attempts > 0:
                 return self.login(attempts - 1)
-            if not settings.AS_JSON:
+            if not is_structured():
                 traceback.print_exc()
                 print(
                     'Failed to log in. This is usually caused by multiple logins. Please try again later.'
@@ -55,15 +126,63 @@ class TechnicolorRouter(Router):
 
     def logout(self):
         self.sess.cookies.clear()
+        return True
 
     def get_router_information(self):
-        information_url = f"http://{self.gateway}/Wizard/ge_gateway.cgi?be=0&l0=1&l1=0&pageAct=info"
+        information_url = f"http://{self.gateway}{self.INFORMATION_URL}"
         response = self.sess.get(information_url)
-        doc = bs(response.text, 'html.parser')
+        cells = [_text(cell.group(1)) for cell in islice(_INFO_CELL.finditer(response.text), 3)]
+        cells += [''] * (3 - len(cells))
         return TechnicolorInformation(
-            device_name=doc.select(id="td[colspan='3']")[0].text.strip(),
-            serial_number=doc.select(id="td[colspan='3']")[1].text.strip(),
-            software_version=doc.select(id="td[colspan='3']")[2].text.strip(),
+            device_name=cells[0],
+            serial_number=cells[1],
+            software_version=cells[2],
         )
 
-    
+    def get_connected_devices(self, include_disconnected=False):
+        if not self.gateway:
+            handle_error(GATEWAY_ERROR)
+            return False
+
+        devices_url = f"http://{self.gateway}{self.DEVICES_URL}"
+        response = self.sess.get(devices_url)
+
+        devices = [
+            UserDeviceBase(
+                _text(row.group('name')),
+                _text(row.group('ip')),
+                row.group('mac').upper().replace('-', ':'),
+                _text(row.group('interface')),
+                0,
+                _text(row.group('status')).lower() in ('active', 'connected', 'online'),
+                False,
+            ) for row in _DEVICE_ROW.finditer(response.text)
+        ]
+
+        return UserDeviceBaseCollection(devices)
+
+    def get_mac_filters(self):
+        if not self.gateway:
+            handle_error(GATEWAY_ERROR)
+            return False
+
+        mac_filter_url = f"http://{self.gateway}{self.MAC_FILTER_URL}"
+        text = self.sess.get(mac_filter_url).text
+
+        mode = _MAC_FILTER_MODE.search(text)
+        rows = [
+            (_text(row.group('name')), row.group('mac').upper().replace('-', ':'))
+            for row in _MAC_FILTER_ROW.finditer(text)
+        ]
+
+        # The web UI exposes the filter of the primary SSID only.
+        table = MacFilteringTechnicolor.from_rows(0, mode.group('mode').lower() if mode else 'disable', rows)
+
+        return MacFilteringSsidCollection([table])
+
+    def fetch_document(self, path, headers=None):
+        if not self.gateway:
+            handle_error(GATEWAY_ERROR)
+            return False
+
+        return self.sess.get(f"http://{self.gateway}{path}", headers=headers)
@@ -0,0 +1,317 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List
+
+from utils.output import render
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS document_heads (
+    router TEXT NOT NULL,
+    document TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    checked INTEGER NOT NULL,
+    PRIMARY KEY (router, document)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS document_versions (
+    router TEXT NOT NULL,
+    document TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_document_versions_router ON document_versions (router, document, timestamp);
+"""
+
+# Backup outcomes of a document.
+NEW = 'new'
+UNCHANGED = 'unchanged'
+NOT_MODIFIED = 'not-modified'
+FAILED = 'failed'
+
+
+class ContentStore:
+    """
+    Stores blobs by the SHA-256 of their content, compressed.
+
+    A blob is written once whatever the number of documents that hold it, and
+    never rewritten. Writes go through a temporary file and a rename so an
+    interrupted backup never leaves a partial object.
+
+    Args:
+        root (str): The directory of the objects.
+        level (int): The zlib compression level.
+    """
+
+    def __init__(self, root, level=9):
+        self.root = root
+        self.level = level
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, digest):
+        """ The path of an object, fanned out by the first two hex digits. """
+        return os.path.join(self.root, digest[:2], digest[2:])
+
+    def __contains__(self, digest):
+        return os.path.exists(self.path(digest))
+
+    def put(self, data):
+        """
+        Store a blob.
+
+        Args:
+            data (bytes): The blob.
+
+        Returns:
+            tuple[str, bool]: The hex digest of the blob, and True if it was not stored yet.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if os.path.exists(path):
+            return digest, False
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(zlib.compress(data, self.level))
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return digest, True
+
+    def get(self, digest):
+        """ Read a blob back. """
+        with open(self.path(digest), 'rb') as f:
+            return zlib.decompress(f.read())
+
+
+@dataclass
+class DocumentBackup:
+    """
+    Represents the backup of one document of one router.
+
+    Attributes:
+        router (str): The router identifier.
+        document (str): The document name, see `Router.BACKUP_DOCUMENTS`.
+        status (str): NEW, UNCHANGED, NOT_MODIFIED or FAILED.
+        digest (str): The SHA-256 of the document, empty if it failed.
+        size (int): The size of the document, 0 when it was not downloaded.
+        error (str): Why the backup failed.
+    """
+    router: str
+    document: str
+    status: str
+    digest: str = ''
+    size: int = 0
+    error: str = ''
+
+
+class BackupReport:
+    """ Represents the outcome of a backup run. """
+
+    many = True
+
+    def __init__(self, backups=[]):
+        self.backups: List[DocumentBackup] = backups
+
+    def __str__(self):
+        return render(self)
+
+    def records(self):
+        """ Yield the document backups as dicts, one at a time. """
+        for backup in self.backups:
+            yield backup.__dict__
+
+    def text(self):
+        """ Format the document backups as a table. """
+        lines = [
+            f"{b.router:<20} {b.document:<15} {b.status:<13} {b.digest[:12] or b.error}"
+            for b in self.backups
+        ]
+        counts = {}
+        for b in self.backups:
+            counts[b.status] = counts.get(b.status, 0) + 1
+        lines.append(', '.join(f'{count} {status}' for status, count in counts.items()))
+        return '\n'.join(lines)
+
+
+class BackupStore:
+    """
+    A deduplicated store of router configuration documents.
+
+    The documents live in a `ContentStore` under `root/objects`, and a SQLite
+    index under `root/index.sqlite` records the current version of each
+    document and every version seen. The ETag and Last-Modified of the
+    current version are replayed as conditional request headers, so a router
+    that supports them does not even send unchanged documents.
+
+    Args:
+        root (str): The backup directory.
+    """
+
+    def __init__(self, root):
+        os.makedirs(root, exist_ok=True)
+        self.objects = ContentStore(os.path.join(root, 'objects'))
+        self.conn = sqlite3.connect(os.path.join(root, 'index.sqlite'))
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def head(self, router, document):
+        """
+        Get the current version of a document.
+
+        Returns:
+            tuple[str, str, str] | None: The digest, ETag and Last-Modified, None if it was never saved.
+        """
+        return self.conn.execute(
+            'SELECT digest, etag, last_modified FROM document_heads WHERE router = ? AND document = ?',
+            (router, document)
+        ).fetchone()
+
+    def conditional_headers(self, router, document):
+        """ The headers asking the router for the document only if it changed. """
+        head = self.head(router, document)
+        headers = {}
+        if head and head[0] in self.objects:
+            if head[1]:
+                headers['If-None-Match'] = head[1]
+            if head[2]:
+                headers['If-Modified-Since'] = head[2]
+        return headers
+
+    def save(self, router, document, response, timestamp=None) -> DocumentBackup:
+        """
+        Save a downloaded document, unless it is the current version already.
+
+        Args:
+            router (str): The router identifier.
+            document (str): The document name.
+            response (Response): The answer to the conditional request.
+            timestamp (int): The backup time in seconds, defaults to now.
+
+        Returns:
+            DocumentBackup: The outcome.
+        """
+        timestamp = int(timestamp if timestamp is not None else time.time())
+        head = self.head(router, document)
+
+        if response.status_code == 304:
+            if not head:
+                return DocumentBackup(router, document, FAILED, error='not modified, but never saved')
+            with self.conn:
+                self.conn.execute(
+                    'UPDATE document_heads SET checked = ? WHERE router = ? AND document = ?',
+                    (timestamp, router, document)
+                )
+            return DocumentBackup(router, document, NOT_MODIFIED, head[0])
+
+        if not response.ok:
+            return DocumentBackup(router, document, FAILED, error=f'HTTP {response.status_code}')
+
+        content = response.content
+        digest, _ = self.objects.put(content)
+        changed = head is None or head[0] != digest
+
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO document_heads VALUES (?, ?, ?, ?, ?, ?)',
+                (router, document, digest, response.headers.get('ETag'), response.headers.get('Last-Modified'), timestamp)
+            )
+            if changed:
+                self.conn.execute(
+                    'INSERT INTO document_versions VALUES (?, ?, ?, ?, ?)',
+                    (router, document, timestamp, digest, len(content))
+                )
+        return DocumentBackup(router, document, NEW if changed else UNCHANGED, digest, len(content))
+
+    def versions(self, router, document):
+        """
+        List the versions of a document, oldest first.
+
+        Returns:
+            list[tuple[int, str, int]]: The (timestamp, digest, size) of each version.
+        """
+        return self.conn.execute(
+            'SELECT timestamp, digest, size FROM document_versions WHERE router = ? AND document = ? ORDER BY timestamp',
+            (router, document)
+        ).fetchall()
+
+    def read(self, router, document, timestamp=None):
+        """
+        Read a document as it was at a point in time.
+
+        Args:
+            router (str): The router identifier.
+            document (str): The document name.
+            timestamp (int): The point in time, defaults to the current version.
+
+        Returns:
+            bytes | None: The document, None if there was no version yet.
+        """
+        row = self.conn.execute(
+            'SELECT digest FROM document_versions WHERE router = ? AND document = ? AND timestamp <= ? '
+            'ORDER BY timestamp DESC LIMIT 1',
+            (router, document, timestamp if timestamp is not None else 2 ** 62)
+        ).fetchone()
+        return self.objects.get(row[0]) if row else None
+
+
+def backup_fleet(store: BackupStore, routers, max_workers=8) -> BackupReport:
+    """
+    Back up the documents of many logged in routers in parallel.
+
+    The downloads run concurrently, the index is only written from the calling
+    thread as they complete.
+
+    Args:
+        store (BackupStore): The backup store.
+        routers (dict[str, Router]): The routers, by name.
+        max_workers (int): The maximum number of concurrent downloads.
+
+    Returns:
+        BackupReport: The outcome of every document, in router and document order.
+    """
+    jobs = [
+        (name, document, router, path, store.conditional_headers(name, document))
+        for name, router in routers.items()
+        for document, path in router.BACKUP_DOCUMENTS.items()
+    ]
+
+    backups = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            (name, document, executor.submit(router.fetch_document, path, headers))
+            for name, document, router, path, headers in jobs
+        ]
+        for name, document, future in futures:
+            try:
+                response = future.result()
+            except Exception as ex:
+                backups.append(DocumentBackup(name, document, FAILED, error=str(ex)))
+                continue
+            if response is None or response is False:
+                backups.append(DocumentBackup(name, document, FAILED, error='no response'))
+                continue
+            backups.append(store.save(name, document, response))
+
+    return BackupReport(backups)
@@ -0,0 +1,253 @@
+import csv
+import time
+from itertools import islice
+
+from models.information.flybox import FlyboxInformation
+from models.mac_filtering.base import MacFilteringSsidCollection
+from models.user_device.base import UserDeviceBaseCollection
+
+
+# (column, type) pairs, the types are one of 'str', 'int', 'float' and 'bool'.
+DEVICE_COLUMNS = (
+    ('router', 'str'),
+    ('name', 'str'),
+    ('ip_address', 'str'),
+    ('mac_address', 'str'),
+    ('interface', 'str'),
+    ('uptime', 'int'),
+    ('active', 'bool'),
+    ('is_local', 'bool'),
+)
+
+MAC_FILTER_COLUMNS = (
+    ('router', 'str'),
+    ('ssid', 'int'),
+    ('list', 'str'),
+    ('name', 'str'),
+    ('mac_address', 'str'),
+)
+
+SIGNAL_COLUMNS = (
+    ('router', 'str'),
+    ('timestamp', 'int'),
+) + tuple((name, 'str') for name in FlyboxInformation.__dataclass_fields__)
+
+
+def device_rows(router, collection: UserDeviceBaseCollection):
+    """
+    Yield one row per device, in the order of `DEVICE_COLUMNS`.
+
+    Args:
+        router (str): The router identifier.
+        collection (UserDeviceBaseCollection): The devices of the router.
+    """
+    for d in collection.devices:
+        yield (router, d.name, d.ip_address, d.mac_address, d.interface, d.uptime, d.active, d.is_local)
+
+
+def mac_filter_rows(router, collection: MacFilteringSsidCollection):
+    """
+    Yield one row per filtered MAC address, in the order of `MAC_FILTER_COLUMNS`.
+
+    Args:
+        router (str): The router identifier.
+        collection (MacFilteringSsidCollection): The MAC filters of the router.
+    """
+    for ssid in collection.ssids:
+        for user in ssid.blacklisted_users:
+            yield (router, ssid.ssid, 'blacklist', user.name, user.mac_address)
+        for user in ssid.whitelisted_users:
+            yield (router, ssid.ssid, 'whitelist', user.name, user.mac_address)
+
+
+def signal_rows(router, information: FlyboxInformation, timestamp=None):
+    """
+    Yield the row of a router information reading, in the order of `SIGNAL_COLUMNS`.
+
+    Args:
+        router (str): The router identifier.
+        information (InformationBase): The router information, of any model.
+        timestamp (int): The reading time in seconds, defaults to now.
+    """
+    timestamp = int(timestamp if timestamp is not None else time.time())
+    # Other models only have some of the columns, the missing ones are left empty.
+    yield (router, timestamp) + tuple(getattr(information, name, None) for name in FlyboxInformation.__dataclass_fields__)
+
+
+def fleet_rows(routers, kind):
+    """
+    Poll routers one after the other and yield their rows.
+
+    Only the objects of the router being exported are alive at any time.
+
+    Args:
+        routers (Iterable[tuple[str, Router]]): (identifier, logged in router) pairs.
+        kind (str): One of 'devices', 'macfiltering' and 'info'.
+    """
+    for name, router in routers:
+        if kind == 'devices':
+            collection = router.get_connected_devices()
+            if collection:
+                yield from device_rows(name, collection)
+        elif kind == 'macfiltering':
+            collection = router.get_mac_filters()
+            if collection:
+                yield from mac_filter_rows(name, collection)
+        elif kind == 'info':
+            yield from signal_rows(name, router.get_router_information())
+        else:
+            raise ValueError(f'Unknown export kind: {kind}')
+
+
+class ColumnarWriter:
+    """
+    A base class for export writers receiving data one columnar batch at a time.
+
+    Args:
+        path (str): The output file path.
+        columns (tuple[tuple[str, str]]): The (name, type) pairs of the columns.
+    """
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = columns
+        self.rows_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write_batch(self, batch):
+        """
+        Write a batch of columns.
+
+        Args:
+            batch (list[list]): One list of values per column.
+        """
+        raise NotImplementedError("write_batch method must be implemented in derived classes")
+
+    def close(self):
+        """ Finish the file. """
+        raise NotImplementedError("close method must be implemented in derived classes")
+
+
+class CsvWriter(ColumnarWriter):
+    """ Writes batches to a CSV file with a header row. """
+
+    def __init__(self, path, columns):
+        super().__init__(path, columns)
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([name for name, _ in columns])
+
+    def write_batch(self, batch):
+        self.writer.writerows(zip(*batch))
+        self.rows_written += len(batch[0]) if batch else 0
+
+    def close(self):
+        self.file.close()
+
+
+def _arrow_schema(columns):
+    import pyarrow as pa
+
+    types = {'str': pa.string(), 'int': pa.int64(), 'float': pa.float64(), 'bool': pa.bool_()}
+    return pa.schema([(name, types[kind]) for name, kind in columns])
+
+
+def _arrow_batch(schema, batch):
+    import pyarrow as pa
+
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for field, values in zip(schema, batch)],
+        schema=schema
+    )
+
+
+class ParquetWriter(ColumnarWriter):
+    """ Writes each batch as a row group of a Parquet file. Requires pyarrow. """
+
+    def __init__(self, path, columns, compression='zstd'):
+        super().__init__(path, columns)
+        import pyarrow.parquet as pq
+
+        self.schema = _arrow_schema(columns)
+        self.writer = pq.ParquetWriter(path, self.schema, compression=compression)
+
+    def write_batch(self, batch):
+        record_batch = _arrow_batch(self.schema, batch)
+        self.writer.write_batch(record_batch)
+        self.rows_written += record_batch.num_rows
+
+    def close(self):
+        self.writer.close()
+
+
+class ArrowWriter(ColumnarWriter):
+    """ Writes batches to an Arrow IPC file. Requires pyarrow. """
+
+    def __init__(self, path, columns):
+        super().__init__(path, columns)
+        import pyarrow as pa
+
+        self.schema = _arrow_schema(columns)
+        self.sink = pa.OSFile(path, 'wb')
+        self.writer = pa.ipc.new_file(self.sink, self.schema)
+
+    def write_batch(self, batch):
+        record_batch = _arrow_batch(self.schema, batch)
+        self.writer.write_batch(record_batch)
+        self.rows_written += record_batch.num_rows
+
+    def close(self):
+        self.writer.close()
+        self.sink.close()
+
+
+WRITERS = {
+    'csv': CsvWriter,
+    'parquet': ParquetWriter,
+    'arrow': ArrowWriter,
+}
+
+
+def export_rows(rows, writer: ColumnarWriter, batch_size=10000):
+    """
+    Stream rows into a writer in bounded-size columnar batches.
+
+    Args:
+        rows (Iterable[tuple]): The rows, in the column order of the writer.
+        writer (ColumnarWriter): The destination.
+        batch_size (int): The maximum number of rows held in memory.
+
+    Returns:
+        int: The number of rows written.
+    """
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, batch_size))
+        if not chunk:
+            break
+        writer.write_batch([list(column) for column in zip(*chunk)])
+    return writer.rows_written
+
+
+def export_fleet(routers, kind, path, file_format='csv', batch_size=10000):
+    """
+    Export the devices, MAC filters or information of many routers into one file.
+
+    Args:
+        routers (Iterable[tuple[str, Router]]): (identifier, logged in router) pairs.
+        kind (str): One of 'devices', 'macfiltering' and 'info'.
+        path (str): The output file path.
+        file_format (str): One of 'csv', 'parquet' and 'arrow'.
+        batch_size (int): The maximum number of rows held in memory.
+
+    Returns:
+        int: The number of rows written.
+    """
+    columns = {'devices': DEVICE_COLUMNS, 'macfiltering': MAC_FILTER_COLUMNS, 'info': SIGNAL_COLUMNS}[kind]
+    with WRITERS[file_format](path, columns) as writer:
+        return export_rows(fleet_rows(routers, kind), writer, batch_size)
@@ -0,0 +1,380 @@
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+
+MAGIC = b'RMSNAP01'
+LAYOUT_VERSION = 1
+
+MAX_DEVICES = 32
+MAX_FILTERED = 16
+METRICS = ('rsrp', 'rsrq', 'rssi', 'sinr', 'txpower')
+
+# magic, layout version, capacity, record size, active buffer, generation, publish time, count of each buffer
+_HEADER = struct.Struct('<8sIIIIQdII')
+HEADER_SIZE = 64
+
+# router, timestamp, metrics, cell id, band, plmn, device/active/blacklisted/whitelisted counts
+_RECORD_HEAD = struct.Struct('<32sd5d16s8s8sHHHH')
+# mac address, flags (1: active, 2: local), interface
+_DEVICE = struct.Struct('<6sB9s')
+# mac address, ssid, list (0: blacklist, 1: whitelist)
+_FILTERED = struct.Struct('<6sBB')
+RECORD_SIZE = _RECORD_HEAD.size + MAX_DEVICES * _DEVICE.size + MAX_FILTERED * _FILTERED.size
+
+
+def _mac_to_bytes(mac_address):
+    try:
+        return bytes.fromhex(mac_address.replace(':', '').replace('-', ''))[:6]
+    except (AttributeError, ValueError):
+        return b'\0' * 6
+
+
+def _mac_from_bytes(raw):
+    return ':'.join(f'{b:02X}' for b in raw)
+
+
+def _text(raw):
+    return raw.rstrip(b'\0').decode('utf-8', 'replace')
+
+
+@dataclass
+class RouterSnapshot:
+    """
+    Represents the latest known state of a router, as stored in a snapshot file.
+
+    Lists longer than `MAX_DEVICES`/`MAX_FILTERED` are truncated, the counts keep
+    the real totals.
+
+    Attributes:
+        router (str): The router identifier.
+        timestamp (float): When the state was collected.
+        rsrp (float): The RSRP in dBm, NaN if unknown. Same for rsrq, rssi, sinr and txpower.
+        cell_id (str): The cell ID.
+        band (str): The band.
+        plmn (str): The PLMN.
+        device_count (int): The number of known devices.
+        active_count (int): The number of active devices.
+        blacklisted_count (int): The number of blacklisted MAC addresses.
+        whitelisted_count (int): The number of whitelisted MAC addresses.
+        devices (list[tuple[str, bool, bool, str]]): (mac address, active, local, interface) tuples.
+        filtered (list[tuple[str, int, str]]): (mac address, ssid, 'blacklist' | 'whitelist') tuples.
+    """
+    router: str
+    timestamp: float = 0.0
+    rsrp: float = math.nan
+    rsrq: float = math.nan
+    rssi: float = math.nan
+    sinr: float = math.nan
+    txpower: float = math.nan
+    cell_id: str = ''
+    band: str = ''
+    plmn: str = ''
+    device_count: int = 0
+    active_count: int = 0
+    blacklisted_count: int = 0
+    whitelisted_count: int = 0
+    devices: List[Tuple[str, bool, bool, str]] = field(default_factory=list)
+    filtered: List[Tuple[str, int, str]] = field(default_factory=list)
+
+    def update_information(self, information):
+        """ Copy the radio metrics of a router information. """
+        metrics = getattr(information, 'metrics', None)
+        for name in METRICS:
+            value = getattr(metrics, name, None)
+            setattr(self, name, math.nan if value is None else value)
+        self.cell_id = getattr(information, 'cell_id', '')
+        self.band = getattr(information, 'band', '')
+        self.plmn = getattr(information, 'plmn', '')
+        self.timestamp = time.time()
+
+    def update_devices(self, collection):
+        """ Copy the devices of a UserDeviceBaseCollection. """
+        self.device_count = len(collection.devices)
+        self.active_count = sum(1 for d in collection.devices if d.active)
+        self.devices = [(d.mac_address, d.active, d.is_local, d.interface or '') for d in collection.devices]
+        self.timestamp = time.time()
+
+    def update_mac_filters(self, collection):
+        """ Copy the MAC filters of a MacFilteringSsidCollection. """
+        self.blacklisted_count = sum(len(ssid.blacklisted_users) for ssid in collection.ssids)
+        self.whitelisted_count = sum(len(ssid.whitelisted_users) for ssid in collection.ssids)
+        self.filtered = [
+            (user.mac_address, ssid.ssid, kind)
+            for ssid in collection.ssids
+            for kind, users in (('blacklist', ssid.blacklisted_users), ('whitelist', ssid.whitelisted_users))
+            for user in users
+        ]
+        self.timestamp = time.time()
+
+    def pack_into(self, buffer, offset):
+        """ Write the record at `offset` of `buffer`. """
+        _RECORD_HEAD.pack_into(
+            buffer, offset,
+            self.router.encode()[:32], self.timestamp,
+            *(getattr(self, name) for name in METRICS),
+            self.cell_id.encode()[:16], self.band.encode()[:8], self.plmn.encode()[:8],
+            min(self.device_count, 0xFFFF), min(self.active_count, 0xFFFF),
+            min(self.blacklisted_count, 0xFFFF), min(self.whitelisted_count, 0xFFFF),
+        )
+        offset += _RECORD_HEAD.size
+        for i in range(MAX_DEVICES):
+            if i < len(self.devices):
+                mac, active, local, interface = self.devices[i]
+                _DEVICE.pack_into(buffer, offset, _mac_to_bytes(mac), active | local << 1, interface.encode()[:9])
+            else:
+                _DEVICE.pack_into(buffer, offset, b'', 0, b'')
+            offset += _DEVICE.size
+        for i in range(MAX_FILTERED):
+            if i < len(self.filtered):
+                mac, ssid, kind = self.filtered[i]
+                _FILTERED.pack_into(buffer, offset, _mac_to_bytes(mac), ssid & 0xFF, kind == 'whitelist')
+            else:
+                _FILTERED.pack_into(buffer, offset, b'', 0, 0)
+            offset += _FILTERED.size
+
+    @staticmethod
+    def unpack_from(buffer, offset):
+        """ Read the record at `offset` of `buffer`. """
+        head = _RECORD_HEAD.unpack_from(buffer, offset)
+        snapshot = RouterSnapshot(
+            _text(head[0]), head[1], *head[2:7],
+            _text(head[7]), _text(head[8]), _text(head[9]), *head[10:14],
+        )
+        offset += _RECORD_HEAD.size
+        for i in range(min(snapshot.device_count, MAX_DEVICES)):
+            mac, flags, interface = _DEVICE.unpack_from(buffer, offset + i * _DEVICE.size)
+            snapshot.devices.append((_mac_from_bytes(mac), bool(flags & 1), bool(flags & 2), _text(interface)))
+        offset += MAX_DEVICES * _DEVICE.size
+        filtered = min(snapshot.blacklisted_count + snapshot.whitelisted_count, MAX_FILTERED)
+        for i in range(filtered):
+            mac, ssid, kind = _FILTERED.unpack_from(buffer, offset + i * _FILTERED.size)
+            snapshot.filtered.append((_mac_from_bytes(mac), ssid, 'whitelist' if kind else 'blacklist'))
+        return snapshot
+
+
+def _buffer_offset(capacity, buffer):
+    return HEADER_SIZE + buffer * capacity * RECORD_SIZE
+
+
+class SnapshotWriter:
+    """
+    Publishes router snapshots into a memory-mapped file.
+
+    The file holds two buffers. A publish fills the inactive one, then flips
+    the active buffer index and bumps the generation in the header, so readers
+    always see a complete set of records. Snapshots are changed and published
+    under `lock`, so concurrent polls never publish a half updated record.
+
+    Args:
+        path (str): The snapshot file.
+        capacity (int): The maximum number of routers.
+    """
+
+    def __init__(self, path, capacity=1024):
+        self.path = path
+        self.capacity = capacity
+        self.snapshots = {}
+        self.lock = threading.RLock()
+        size = _buffer_offset(capacity, 2)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(fd, size)
+            self.mm = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        magic, version, old_capacity, record_size, active, generation, *_ = _HEADER.unpack_from(self.mm, 0)
+        if (magic, version, old_capacity, record_size) != (MAGIC, LAYOUT_VERSION, capacity, RECORD_SIZE):
+            active, generation = 0, 0
+        self.active = active
+        self.generation = generation
+        _HEADER.pack_into(self.mm, 0, MAGIC, LAYOUT_VERSION, capacity, RECORD_SIZE, active, generation, time.time(), 0, 0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, router):
+        """ Get the snapshot of a router, creating it on first use. """
+        with self.lock:
+            if router not in self.snapshots:
+                if len(self.snapshots) >= self.capacity:
+                    raise ValueError(f'The snapshot file is full ({self.capacity} routers)')
+                self.snapshots[router] = RouterSnapshot(router)
+            return self.snapshots[router]
+
+    def publish(self):
+        """ Write all snapshots to the inactive buffer and make it the active one. """
+        with self.lock:
+            self._publish()
+
+    def _publish(self):
+        target = 1 - self.active
+        offset = _buffer_offset(self.capacity, target)
+        snapshots = list(self.snapshots.values())
+        for i, snapshot in enumerate(snapshots):
+            snapshot.pack_into(self.mm, offset + i * RECORD_SIZE)
+
+        counts = [0, 0]
+        counts[target] = len(snapshots)
+        counts[self.active] = _HEADER.unpack_from(self.mm, 0)[7 + self.active]
+        self.mm.flush()
+
+        self.active = target
+        self.generation += 1
+        _HEADER.pack_into(
+            self.mm, 0, MAGIC, LAYOUT_VERSION, self.capacity, RECORD_SIZE,
+            self.active, self.generation, time.time(), *counts
+        )
+        self.mm.flush(0, HEADER_SIZE)
+
+    def close(self):
+        self.mm.close()
+
+
+class SnapshotCollector:
+    """
+    Feeds a snapshot writer from router polls.
+
+    `on_result` matches the callback of `PollScheduler`, and publishes at most
+    once every `publish_interval` seconds.
+
+    Args:
+        writer (SnapshotWriter): The destination.
+        publish_interval (float): The minimum time between two publishes, in seconds.
+    """
+
+    def __init__(self, writer, publish_interval=1.0):
+        self.writer = writer
+        self.publish_interval = publish_interval
+        self.published_at = 0.0
+
+    def update(self, router, endpoint, result):
+        """ Store the result of a poll, see `on_result` of `PollScheduler`. """
+        with self.writer.lock:
+            snapshot = self.writer.get(router)
+            if endpoint == 'info':
+                snapshot.update_information(result)
+            elif endpoint == 'devices':
+                snapshot.update_devices(result)
+            elif endpoint == 'macfiltering':
+                snapshot.update_mac_filters(result)
+
+    def on_result(self, router, endpoint, result):
+        # Polls run on many threads, the writer lock covers the update and the publish decision.
+        with self.writer.lock:
+            self.update(router, endpoint, result)
+            if time.monotonic() - self.published_at >= self.publish_interval:
+                self.writer.publish()
+                self.published_at = time.monotonic()
+
+    def collect(self, routers):
+        """
+        Poll every router once and publish.
+
+        Args:
+            routers (Iterable[tuple[str, Router]]): (identifier, logged in router) pairs.
+        """
+        for name, router in routers:
+            self.update(name, 'info', router.get_router_information())
+            devices = router.get_connected_devices()
+            if devices:
+                self.update(name, 'devices', devices)
+            mac_filters = router.get_mac_filters()
+            if mac_filters:
+                self.update(name, 'macfiltering', mac_filters)
+        with self.writer.lock:
+            self.writer.publish()
+            self.published_at = time.monotonic()
+
+
+class SnapshotReader:
+    """
+    Reads a snapshot file through a read-only memory map.
+
+    Records are decoded on access only, and a read is retried when the writer
+    published while it was in progress.
+
+    Args:
+        path (str): The snapshot file.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.capacity, record_size, *_ = _HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != LAYOUT_VERSION or record_size != RECORD_SIZE:
+            raise ValueError(f'{path} is not a version {LAYOUT_VERSION} snapshot file')
+        self._names = None
+        self._names_generation = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _header(self):
+        _, _, _, _, active, generation, updated, *counts = _HEADER.unpack_from(self.mm, 0)
+        return active, generation, updated, counts[active]
+
+    @property
+    def generation(self):
+        """ The number of publishes so far. """
+        return self._header()[1]
+
+    @property
+    def updated(self):
+        """ The time of the last publish. """
+        return self._header()[2]
+
+    def __len__(self):
+        return self._header()[3]
+
+    def get(self, index) -> Optional[RouterSnapshot]:
+        """
+        Read the snapshot at an index.
+
+        Returns:
+            RouterSnapshot | None: The snapshot, None if the index is out of range.
+        """
+        while True:
+            active, generation, _, count = self._header()
+            if not 0 <= index < count:
+                return None
+            snapshot = RouterSnapshot.unpack_from(
+                self.mm, _buffer_offset(self.capacity, active) + index * RECORD_SIZE)
+            # A publish may have started rewriting this buffer since, read it again.
+            if self._header()[1] == generation:
+                return snapshot
+
+    def index(self, router):
+        """
+        Find the index of a router, the names are scanned once per generation.
+
+        Returns:
+            int | None: The index, None if the router is unknown.
+        """
+        active, generation, _, count = self._header()
+        if self._names_generation != generation:
+            offset = _buffer_offset(self.capacity, active)
+            self._names = {
+                _text(self.mm[offset + i * RECORD_SIZE:offset + i * RECORD_SIZE + 32]): i for i in range(count)
+            }
+            self._names_generation = generation
+        return self._names.get(router)
+
+    def find(self, router) -> Optional[RouterSnapshot]:
+        """ Read the snapshot of a router by identifier. """
+        index = self.index(router)
+        return None if index is None else self.get(index)
+
+    def close(self):
+        self.mm.close()
@@ -0,0 +1,374 @@
+import sqlite3
+import time
+
+from models.information.flybox import FlyboxInformation
+from models.information.metrics import parse_quantity
+from models.user_device.base import UserDeviceBaseCollection
+
+
+SIGNAL_METRICS = ('rsrp', 'rsrq', 'rssi', 'sinr', 'txpower')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS signal_samples (
+    router TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    rsrp REAL,
+    rsrq REAL,
+    rssi REAL,
+    sinr REAL,
+    txpower REAL,
+    cell_id TEXT,
+    band TEXT,
+    plmn TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_signal_samples_router_ts ON signal_samples (router, timestamp);
+CREATE INDEX IF NOT EXISTS idx_signal_samples_ts ON signal_samples (timestamp);
+
+CREATE TABLE IF NOT EXISTS signal_rollups (
+    router TEXT NOT NULL,
+    resolution INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    rsrp REAL,
+    rsrq REAL,
+    rssi REAL,
+    sinr REAL,
+    txpower REAL,
+    min_rsrp REAL,
+    min_rsrq REAL,
+    min_rssi REAL,
+    min_sinr REAL,
+    min_txpower REAL,
+    max_rsrp REAL,
+    max_rsrq REAL,
+    max_rssi REAL,
+    max_sinr REAL,
+    max_txpower REAL,
+    PRIMARY KEY (router, resolution, timestamp)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_signal_rollups_ts ON signal_rollups (resolution, timestamp);
+
+CREATE TABLE IF NOT EXISTS device_snapshots (
+    router TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    mac_address TEXT NOT NULL,
+    name TEXT,
+    ip_address TEXT,
+    interface TEXT,
+    active INTEGER NOT NULL,
+    is_local INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_device_snapshots_router_ts ON device_snapshots (router, timestamp);
+CREATE INDEX IF NOT EXISTS idx_device_snapshots_ts ON device_snapshots (timestamp);
+
+CREATE TABLE IF NOT EXISTS watermarks (
+    job TEXT PRIMARY KEY,
+    timestamp INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class SqliteStore:
+    """
+    A time-series store for router signal metrics and device snapshots.
+
+    Samples are buffered in memory and written in a single transaction once
+    `batch_size` rows are pending, or when `flush` is called. A row the
+    database rejects is dropped and counted in `dropped`, the rest of its
+    batch is written. The database runs in WAL mode so readers are not
+    blocked by the collector.
+
+    Args:
+        path (str): The path to the SQLite database.
+        batch_size (int): The number of pending rows that triggers a write.
+    """
+
+    def __init__(self, path, batch_size=1000):
+        self.path = path
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA temp_store=MEMORY')
+        self.conn.executescript(_SCHEMA)
+        self._migrate()
+        self._signal_rows = []
+        self._device_rows = []
+        self.dropped = 0
+
+    def _migrate(self):
+        # Rollups written before the extremes were kept get the columns, left NULL.
+        columns = {row['name'] for row in self.conn.execute('PRAGMA table_info(signal_rollups)')}
+        for prefix in ('min', 'max'):
+            for m in SIGNAL_METRICS:
+                if f'{prefix}_{m}' not in columns:
+                    self.conn.execute(f'ALTER TABLE signal_rollups ADD COLUMN {prefix}_{m} REAL')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def pending(self):
+        """ The number of buffered rows not yet written. """
+        return len(self._signal_rows) + len(self._device_rows)
+
+    def add_information(self, router, information: FlyboxInformation, timestamp=None):
+        """
+        Buffer a signal sample.
+
+        Args:
+            router (str): The router identifier.
+            information (FlyboxInformation): The polled router information.
+            timestamp (int): The sample time in seconds, defaults to now.
+        """
+        self._signal_rows.append((
+            router,
+            int(timestamp if timestamp is not None else time.time()),
+            parse_quantity(information.rsrp),
+            parse_quantity(information.rsrq),
+            parse_quantity(information.rssi),
+            parse_quantity(information.sinr),
+            parse_quantity(information.wireless_transmit_power),
+            information.cell_id,
+            information.band,
+            information.plmn,
+        ))
+        self._maybe_flush()
+
+    def add_devices(self, router, collection: UserDeviceBaseCollection, timestamp=None):
+        """
+        Buffer a snapshot of the devices known to a router.
+
+        Args:
+            router (str): The router identifier.
+            collection (UserDeviceBaseCollection): The polled devices.
+            timestamp (int): The snapshot time in seconds, defaults to now.
+        """
+        timestamp = int(timestamp if timestamp is not None else time.time())
+        self._device_rows.extend(
+            (router, timestamp, d.mac_address, d.name, d.ip_address, d.interface, int(d.active), int(d.is_local))
+            for d in collection.devices
+        )
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if self.pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """ Write all buffered rows in a single transaction. """
+        if not self.pending:
+            return
+
+        # The buffers are taken first, so a batch that fails is never retried forever.
+        batches = (
+            ('INSERT INTO signal_samples VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', self._signal_rows),
+            ('INSERT INTO device_snapshots VALUES (?, ?, ?, ?, ?, ?, ?, ?)', self._device_rows),
+        )
+        self._signal_rows = []
+        self._device_rows = []
+
+        try:
+            with self.conn:
+                for sql, rows in batches:
+                    if rows:
+                        self.conn.executemany(sql, rows)
+        except sqlite3.IntegrityError:
+            # One bad row, e.g. a device without a MAC address, fails the batch: write the rows one by one.
+            with self.conn:
+                for sql, rows in batches:
+                    for row in rows:
+                        try:
+                            self.conn.execute(sql, row)
+                        except sqlite3.IntegrityError:
+                            self.dropped += 1
+
+    def close(self):
+        """ Flush pending rows and close the database. """
+        self.flush()
+        self.conn.close()
+
+    def signal_range(self, router, start, end):
+        """
+        Get the raw signal samples of a router.
+
+        Args:
+            router (str): The router identifier.
+            start (int): The first timestamp, inclusive.
+            end (int): The last timestamp, exclusive.
+
+        Returns:
+            list[dict]: The samples ordered by timestamp.
+        """
+        self.flush()
+        rows = self.conn.execute(
+            'SELECT * FROM signal_samples WHERE router = ? AND timestamp >= ? AND timestamp < ? ORDER BY timestamp',
+            (router, start, end)
+        )
+        return [dict(row) for row in rows]
+
+    def signal_aggregate(self, router, start, end, bucket=3600, resolution=None):
+        """
+        Aggregate the signal metrics of a router into time buckets.
+
+        Args:
+            router (str): The router identifier.
+            start (int): The first timestamp, inclusive.
+            end (int): The last timestamp, exclusive.
+            bucket (int): The bucket width in seconds.
+            resolution (int): Read from the rollups of this resolution instead of the raw samples.
+
+        Returns:
+            list[dict]: One row per bucket with the sample count and the average, minimum
+                and maximum of every metric.
+        """
+        self.flush()
+        if resolution is None:
+            table, weight, where, low, high = 'signal_samples', '1', '', '', ''
+        else:
+            table, weight, where, low, high = 'signal_rollups', 'samples', 'AND resolution = :resolution', 'min_', 'max_'
+
+        # Rollups hold averages, so they are re-weighted by their sample count,
+        # and the extremes come from the extremes they kept, not from the averages.
+        columns = ', '.join(
+            f'SUM({m} * {weight}) / SUM(CASE WHEN {m} IS NULL THEN 0 ELSE {weight} END) AS avg_{m}, '
+            f'MIN({low}{m}) AS min_{m}, MAX({high}{m}) AS max_{m}'
+            for m in SIGNAL_METRICS
+        )
+        rows = self.conn.execute(
+            f'SELECT (timestamp / :bucket) * :bucket AS bucket, SUM({weight}) AS samples, {columns} '
+            f'FROM {table} WHERE router = :router AND timestamp >= :start AND timestamp < :end {where} '
+            'GROUP BY bucket ORDER BY bucket',
+            {'router': router, 'start': start, 'end': end, 'bucket': bucket, 'resolution': resolution}
+        )
+        return [dict(row) for row in rows]
+
+    def devices_at(self, router, timestamp=None):
+        """
+        Get the latest device snapshot of a router taken at or before a given time.
+
+        Args:
+            router (str): The router identifier.
+            timestamp (int): The point in time, defaults to the latest snapshot.
+
+        Returns:
+            list[dict]: The devices of the snapshot.
+        """
+        self.flush()
+        timestamp = int(timestamp if timestamp is not None else time.time())
+        rows = self.conn.execute(
+            'SELECT * FROM device_snapshots WHERE router = :router AND timestamp = ('
+            '  SELECT MAX(timestamp) FROM device_snapshots WHERE router = :router AND timestamp <= :timestamp'
+            ')',
+            {'router': router, 'timestamp': timestamp}
+        )
+        return [dict(row) for row in rows]
+
+    def device_history(self, router, mac_address, start, end):
+        """
+        Get the snapshots in which a device was seen.
+
+        Args:
+            router (str): The router identifier.
+            mac_address (str): The MAC address of the device.
+            start (int): The first timestamp, inclusive.
+            end (int): The last timestamp, exclusive.
+
+        Returns:
+            list[dict]: The device rows ordered by timestamp.
+        """
+        self.flush()
+        rows = self.conn.execute(
+            'SELECT * FROM device_snapshots WHERE router = ? AND timestamp >= ? AND timestamp < ? '
+            'AND mac_address = ? ORDER BY timestamp',
+            (router, start, end, mac_address)
+        )
+        return [dict(row) for row in rows]
+
+    def downsample(self, resolution=300, before=None):
+        """
+        Roll raw signal samples up into buckets of `resolution` seconds.
+
+        Only complete buckets older than `before` are rolled up. A bucket is
+        rolled up again when rows arrive for it later, e.g. from the buffer of
+        another collector, so the job can run as often as needed and no sample
+        is left out of the rollups.
+
+        Args:
+            resolution (int): The bucket width in seconds.
+            before (int): Roll up samples older than this timestamp, defaults to now.
+
+        Returns:
+            int: The number of rollup rows written.
+        """
+        self.flush()
+        before = int(before if before is not None else time.time()) // resolution * resolution
+        job = f'downsample:{resolution}'
+        # The time watermark covers the buckets completed since the last run, the rowid
+        # watermark the rows inserted since then, whatever their timestamp.
+        watermarks = dict(self.conn.execute(
+            'SELECT job, timestamp FROM watermarks WHERE job IN (?, ?)', (job, f'{job}:rowid')
+        ).fetchall())
+        since = watermarks.get(job, 0)
+        last_rowid = watermarks.get(f'{job}:rowid', 0)
+        max_rowid = self.conn.execute('SELECT MAX(rowid) FROM signal_samples').fetchone()[0] or 0
+        if max_rowid < last_rowid:
+            # The table was emptied by the retention and its rowids started over.
+            last_rowid = 0
+        if since >= before and max_rowid == last_rowid:
+            return 0
+
+        names = ', '.join(f'{m}, min_{m}, max_{m}' for m in SIGNAL_METRICS)
+        aggregates = ', '.join(f'AVG(s.{m}), MIN(s.{m}), MAX(s.{m})' for m in SIGNAL_METRICS)
+        with self.conn:
+            self.conn.execute(
+                'WITH dirty AS ('
+                '  SELECT router, (timestamp / :resolution) * :resolution AS bucket FROM signal_samples'
+                '  WHERE rowid > :last_rowid AND rowid <= :max_rowid AND timestamp < :before'
+                '  UNION'
+                '  SELECT router, (timestamp / :resolution) * :resolution AS bucket FROM signal_samples'
+                '  WHERE timestamp >= :since AND timestamp < :before'
+                ') '
+                f'INSERT OR REPLACE INTO signal_rollups (router, resolution, timestamp, samples, {names}) '
+                f'SELECT d.router, :resolution, d.bucket, COUNT(*), {aggregates} '
+                'FROM dirty d JOIN signal_samples s '
+                'ON s.router = d.router AND s.timestamp >= d.bucket AND s.timestamp < d.bucket + :resolution '
+                'GROUP BY d.router, d.bucket',
+                {'resolution': resolution, 'since': since, 'before': before, 'last_rowid': last_rowid, 'max_rowid': max_rowid}
+            )
+            # The rowcount of a statement starting with WITH is not reported.
+            written = self.conn.execute('SELECT changes()').fetchone()[0]
+            self.conn.executemany('INSERT OR REPLACE INTO watermarks VALUES (?, ?)', [
+                (job, max(since, before)), (f'{job}:rowid', max_rowid)
+            ])
+        return written
+
+    def apply_retention(self, raw_seconds, rollup_seconds=None, now=None):
+        """
+        Delete data older than the retention periods.
+
+        Args:
+            raw_seconds (int): How long to keep raw signal samples and device snapshots.
+            rollup_seconds (int): How long to keep rollups, forever if None.
+            now (int): The current timestamp, defaults to now.
+
+        Returns:
+            int: The number of deleted rows.
+        """
+        self.flush()
+        now = int(now if now is not None else time.time())
+        deleted = 0
+        with self.conn:
+            deleted += self.conn.execute(
+                'DELETE FROM signal_samples WHERE timestamp < ?', (now - raw_seconds,)).rowcount
+            deleted += self.conn.execute(
+                'DELETE FROM device_snapshots WHERE timestamp < ?', (now - raw_seconds,)).rowcount
+            if rollup_seconds is not None:
+                deleted += self.conn.execute(
+                    'DELETE FROM signal_rollups WHERE timestamp < ?', (now - rollup_seconds,)).rowcount
+        self.conn.execute('PRAGMA wal_checkpoint(PASSIVE)')
+        return deleted
@@ -0,0 +1,111 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Actions that only read from the router and can run concurrently, by router method.
+READ_ACTIONS = {
+    'info': 'get_router_information',
+    'devices': 'get_connected_devices',
+    'macfiltering': 'get_mac_filters',
+    'traffic': 'get_traffic_statistics',
+    'monthly': 'get_monthly_statistics',
+}
+
+# Actions that change the router state, they run alone and in order.
+WRITE_ACTIONS = {
+    'restart': 'restart_router',
+}
+
+ACTIONS = tuple(READ_ACTIONS) + tuple(WRITE_ACTIONS)
+
+
+def parse_script(lines):
+    """
+    Parse a batch script, one or more whitespace separated actions per line.
+
+    Everything after a '#' is a comment, blank lines are ignored.
+
+    Args:
+        lines (Iterable[str]): The script lines.
+
+    Returns:
+        list[str]: The actions in order.
+
+    Raises:
+        ValueError: If an action is unknown.
+    """
+    actions = []
+    for line in lines:
+        actions.extend(line.split('#', 1)[0].split())
+    return validate_actions(actions)
+
+
+def validate_actions(actions):
+    """
+    Check the actions and drop reads repeated since the last write, which would return the same data.
+
+    Raises:
+        ValueError: If an action is unknown.
+    """
+    result = []
+    seen = set()
+    for action in actions:
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown action '{action}', choose from {', '.join(ACTIONS)}")
+        if action in READ_ACTIONS:
+            if action in seen:
+                continue
+            seen.add(action)
+        else:
+            # A write changes the router, the reads after it are new.
+            seen.clear()
+        result.append(action)
+    return result
+
+
+def unsupported_actions(router, actions):
+    """
+    List the actions that the router does not implement.
+
+    Args:
+        router (Router): The router.
+        actions (list[str]): The actions, see `ACTIONS`.
+
+    Returns:
+        list[str]: The unsupported actions, in order.
+    """
+    methods = {**READ_ACTIONS, **WRITE_ACTIONS}
+    return [action for action in actions if not router.implements(methods[action])]
+
+
+def run_actions(router, actions, max_workers=4):
+    """
+    Run actions over the session of a logged in router.
+
+    Consecutive reads run in parallel, writes act as barriers so every action
+    sees the effects of the writes listed before it.
+
+    Args:
+        router (Router): The logged in router.
+        actions (list[str]): The actions, see `ACTIONS`.
+        max_workers (int): The maximum number of concurrent reads.
+
+    Returns:
+        list[tuple[str, object]]: The (action, result) pairs in the order of `actions`.
+    """
+    results = []
+    pending = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        def drain():
+            results.extend((action, future.result()) for action, future in pending)
+            pending.clear()
+
+        for action in actions:
+            if action in READ_ACTIONS:
+                pending.append((action, executor.submit(getattr(router, READ_ACTIONS[action]))))
+            else:
+                drain()
+                results.append((action, getattr(router, WRITE_ACTIONS[action])()))
+        drain()
+
+    return results
@@ -8,4 +8,6 @@ GATEWAY_ERROR = ('GATEWAY_ERROR', "Gateway not found. Please check your network
 LOGIN_FAILED = ('LOGIN_FAILED', 'Login failed')
 SOMETHING_WRONG = ('SOMETHING_WRONG', "Something went wrong")
 MANY_LOGIN_ATTEMPTS = ('MANY_LOGIN_ATTEMPTS', 'You have attempted to log in three consecutive times unsuccessfully. Please try again later.')
-ROUTER_NOT_SUPPORTED = ('ROUTER_NOT_SUPPORTED', "The current router is not supported/implemented.")
\ No newline at end of file
+ROUTER_NOT_SUPPORTED = ('ROUTER_NOT_SUPPORTED', "The current router is not supported/implemented.")
+EXPERIMENTAL_ACTION = ('EXPERIMENTAL_ACTION', "Actions that change the router are not available with an experimental driver:")
+ACTION_NOT_SUPPORTED = ('ACTION_NOT_SUPPORTED', "The router does not support these actions:")
\ No newline at end of file
@@ -0,0 +1,207 @@
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.scheduler import PollScheduler
+
+
+# Endpoints polled for the exporter, with their default interval in seconds.
+EXPORTER_ENDPOINTS = {
+    'info': ('get_router_information', 30),
+    'devices': ('get_connected_devices', 60),
+    'macfiltering': ('get_mac_filters', 600),
+}
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Gauge name, help text and SignalMetrics attribute of each radio metric.
+SIGNAL_GAUGES = (
+    ('router_signal_rsrp_dbm', 'Reference signal received power.', 'rsrp'),
+    ('router_signal_rsrq_db', 'Reference signal received quality.', 'rsrq'),
+    ('router_signal_rssi_dbm', 'Received signal strength indicator.', 'rssi'),
+    ('router_signal_sinr_db', 'Signal to interference plus noise ratio.', 'sinr'),
+    ('router_signal_tx_power_dbm', 'Uplink transmit power.', 'txpower'),
+)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _sample(name, labels, value):
+    label_text = ','.join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+    return f'{name}{{{label_text}}} {value}'
+
+
+class RouterMetrics:
+    """
+    Keeps the latest data of many routers, rendered in the Prometheus text format.
+
+    The exposition is rendered whenever new data arrives, by the polling
+    threads, so a scrape only copies the last rendering and never reaches
+    the routers.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.information = {}
+        self.signals = {}
+        self.devices = {}
+        self.mac_filters = {}
+        self.updated = {}
+        self.errors = Counter()
+        self.up = {}
+        self._lock = threading.Lock()
+        self._rendered = b''
+
+    def on_result(self, router, endpoint, result):
+        """ Store the result of a `PollScheduler` poll. """
+        store = {'info': self.information, 'devices': self.devices, 'macfiltering': self.mac_filters}.get(endpoint)
+        if store is None:
+            return
+        # The radio fields are parsed once per poll, not on every rendering.
+        metrics = getattr(result, 'metrics', None) if endpoint == 'info' else None
+        with self._lock:
+            store[router] = result
+            if endpoint == 'info':
+                if metrics is None:
+                    self.signals.pop(router, None)
+                else:
+                    self.signals[router] = metrics
+            self.updated[router, endpoint] = self.clock()
+            self.up[router] = 1
+            self._rendered = self._render()
+
+    def on_error(self, router, endpoint, ex):
+        """ Count a failed `PollScheduler` poll, the last data of the router is kept. """
+        with self._lock:
+            self.errors[router, endpoint] += 1
+            self.up[router] = 0
+            self._rendered = self._render()
+
+    def exposition(self):
+        """ The last rendering, in the Prometheus text format. """
+        return self._rendered
+
+    def _render(self):
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            if samples:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                lines.extend(_sample(name, labels, value) for labels, value in samples)
+
+        family('router_up', 'gauge', 'Whether the last poll of the router succeeded.', [
+            ({'router': router}, up) for router, up in sorted(self.up.items())
+        ])
+
+        family('router_info', 'gauge', 'The router model and firmware.', [
+            ({'router': router, 'device_name': information.device_name, 'software_version': information.software_version}, 1)
+            for router, information in sorted(self.information.items())
+        ])
+        family('router_cell_info', 'gauge', 'The cell the router is attached to.', [
+            ({'router': router, 'cell_id': metrics.cell_id, 'band': metrics.band, 'plmn': metrics.plmn}, 1)
+            for router, metrics in sorted(self.signals.items())
+        ])
+        for name, help_text, attribute in SIGNAL_GAUGES:
+            family(name, 'gauge', help_text, [
+                ({'router': router}, getattr(metrics, attribute))
+                for router, metrics in sorted(self.signals.items()) if getattr(metrics, attribute) is not None
+            ])
+
+        device_samples = []
+        for router, collection in sorted(self.devices.items()):
+            counts = Counter(device.interface or 'unknown' for device in collection.devices if device.active)
+            device_samples.extend(({'router': router, 'interface': interface}, count) for interface, count in sorted(counts.items()))
+        family('router_connected_devices', 'gauge', 'The active devices by interface.', device_samples)
+
+        family('router_mac_filter_entries', 'gauge', 'The MAC addresses of each SSID filter list.', [
+            ({'router': router, 'ssid': ssid.ssid, 'list': kind}, len(users))
+            for router, collection in sorted(self.mac_filters.items())
+            for ssid in collection.ssids
+            for kind, users in (('blacklist', ssid.blacklisted_users), ('whitelist', ssid.whitelisted_users))
+        ])
+
+        family('router_last_update_timestamp_seconds', 'gauge', 'When each endpoint was last polled successfully.', [
+            ({'router': router, 'endpoint': endpoint}, f'{updated:.3f}') for (router, endpoint), updated in sorted(self.updated.items())
+        ])
+        family('router_poll_errors_total', 'counter', 'The failed polls of each endpoint.', [
+            ({'router': router, 'endpoint': endpoint}, count) for (router, endpoint), count in sorted(self.errors.items())
+        ])
+
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def parse_address(text):
+    """
+    Parses a listen address.
+
+    Args:
+        text (str): A port, or a host and port separated by a colon.
+
+    Returns:
+        tuple[str, int]: The host, empty for all interfaces, and the port.
+
+    Raises:
+        ValueError: If the port is not a number.
+    """
+    host, _, port = text.rpartition(':')
+    if not port.isdigit():
+        raise ValueError(f"invalid exporter address '{text}'")
+    return host.strip('[]'), int(port)
+
+
+def _handler(metrics):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.exposition()
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+
+class MetricsExporter:
+    """
+    Serves `/metrics` for logged in routers, refreshed in the background.
+
+    The routers are polled by a `PollScheduler`, so their load does not depend
+    on the number of scrapers and a dead router is backed off by its circuit
+    breaker.
+
+    Args:
+        routers (dict[str, Router]): The logged in routers, by name.
+        address (tuple[str, int]): The host and port to listen on.
+        endpoints (dict): Endpoint name to (router method, interval) pairs, defaults to `EXPORTER_ENDPOINTS`.
+    """
+
+    def __init__(self, routers, address=('', 9877), endpoints=None):
+        self.metrics = RouterMetrics()
+        self.scheduler = PollScheduler(on_result=self.metrics.on_result, on_error=self.metrics.on_error)
+        for name, router in routers.items():
+            self.scheduler.add_router(name, router, endpoints or EXPORTER_ENDPOINTS)
+        self.server = ThreadingHTTPServer(address, _handler(self.metrics))
+        self.stop = threading.Event()
+
+    def serve_forever(self):
+        """ Poll in a background thread and serve scrapes until interrupted. """
+        poller = threading.Thread(target=self.scheduler.run, args=(self.stop,), daemon=True)
+        poller.start()
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop.set()
+            self.server.server_close()
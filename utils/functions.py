@@ -1,14 +1,16 @@
 import json
-from utils import settings
+import sys
+from utils.output import is_structured
 
-def handle_message(key, code, details=''):
+def handle_message(key, code, details='', file=None):
     message = code[1] + ' ' + details
-    if settings.AS_JSON:
+    if is_structured():
         message = json.dumps({key: code[0], 'message': message})
-    print(message)
+    print(message, file=file)
 
 def handle_info(code, details=''):
-    handle_message('info', code, details)
+    # In structured formats stdout holds one document, the outcomes of writes are part of it.
+    handle_message('info', code, details, file=sys.stderr if is_structured() else None)
 
 def handle_error(code, details = ''):
     handle_message('error', code, details)
\ No newline at end of file
@@ -0,0 +1,172 @@
+import os
+import sqlite3
+import time
+
+from utils import settings
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS login_state (
+    router TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    cooldown_until REAL NOT NULL DEFAULT 0,
+    failures INTEGER NOT NULL DEFAULT 0,
+    total_failures INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+
+class LoginCoordinator:
+    """
+    Coordinates login attempts to routers across threads and processes.
+
+    Every router has a token bucket of login attempts and a cooldown that is
+    entered when the router reports a lockout or after too many consecutive
+    failures. The state lives in a small SQLite database, so concurrent jobs
+    on the same host share it.
+
+    Args:
+        path (str): The path to the state database.
+        rate (float): The number of login attempts regained per second.
+        burst (int): The maximum number of attempts that can be made in a row.
+        cooldown (float): How long to leave a locked router alone, in seconds.
+        max_failures (int): The number of consecutive failures that triggers a cooldown.
+    """
+
+    def __init__(self, path=None, rate=0.1, burst=3, cooldown=300, max_failures=3):
+        self.path = path or settings.LOGIN_STATE_PATH
+        self.rate = rate
+        self.burst = burst
+        self.cooldown = cooldown
+        self.max_failures = max_failures
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+
+    def _connect(self):
+        # Autocommit mode, transactions are opened explicitly with BEGIN IMMEDIATE.
+        return _Connection(self.path)
+
+    def _load(self, conn, router, now):
+        row = conn.execute(
+            'SELECT tokens, updated, cooldown_until, failures FROM login_state WHERE router = ?', (router,)
+        ).fetchone()
+        if row is None:
+            conn.execute('INSERT INTO login_state (router, tokens, updated) VALUES (?, ?, ?)', (router, self.burst, now))
+            return float(self.burst), 0.0, 0
+        tokens, updated, cooldown_until, failures = row
+        return min(self.burst, tokens + (now - updated) * self.rate), cooldown_until, failures
+
+    def try_acquire(self, router):
+        """
+        Take a login attempt from the bucket of a router without waiting.
+
+        Args:
+            router (str): The router identifier.
+
+        Returns:
+            float: 0 if an attempt was taken, otherwise the number of seconds to wait.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            tokens, cooldown_until, _ = self._load(conn, router, now)
+            if cooldown_until > now:
+                delay = cooldown_until - now
+            elif tokens >= 1:
+                tokens -= 1
+                delay = 0.0
+            else:
+                delay = (1 - tokens) / self.rate
+            conn.execute('UPDATE login_state SET tokens = ?, updated = ? WHERE router = ?', (tokens, now, router))
+        return delay
+
+    def acquire(self, router, max_wait=None):
+        """
+        Wait until a login attempt is allowed for a router.
+
+        Args:
+            router (str): The router identifier.
+            max_wait (float): The maximum time to wait in seconds, defaults to `settings.LOGIN_MAX_WAIT`.
+
+        Returns:
+            bool: True if an attempt was taken, False if it would take longer than `max_wait`.
+        """
+        max_wait = settings.LOGIN_MAX_WAIT if max_wait is None else max_wait
+        deadline = time.time() + max_wait
+        while True:
+            delay = self.try_acquire(router)
+            if not delay:
+                return True
+            if time.time() + delay > deadline:
+                return False
+            time.sleep(delay)
+
+    def record_success(self, router):
+        """ Reset the consecutive failures of a router. """
+        with self._connect() as conn:
+            self._load(conn, router, time.time())
+            conn.execute('UPDATE login_state SET failures = 0 WHERE router = ?', (router,))
+
+    def record_failure(self, router, locked=False):
+        """
+        Count a failed login and start a cooldown when needed.
+
+        Args:
+            router (str): The router identifier.
+            locked (bool): True if the router reported a lockout.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            _, cooldown_until, failures = self._load(conn, router, now)
+            failures += 1
+            if locked or failures >= self.max_failures:
+                cooldown_until = max(cooldown_until, now + self.cooldown)
+                failures = 0
+            conn.execute(
+                'UPDATE login_state SET failures = ?, total_failures = total_failures + 1, cooldown_until = ? '
+                'WHERE router = ?',
+                (failures, cooldown_until, router)
+            )
+
+    def state(self, router):
+        """
+        Get the throttle state of a router.
+
+        Returns:
+            dict | None: The stored state, or None if the router was never seen.
+        """
+        with self._connect() as conn:
+            cursor = conn.execute('SELECT * FROM login_state WHERE router = ?', (router,))
+            row = cursor.fetchone()
+            return dict(zip([c[0] for c in cursor.description], row)) if row else None
+
+
+class _Connection:
+    """ A connection holding an immediate (write-locked) transaction for the duration of a with block. """
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, *exc):
+        try:
+            self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        finally:
+            self.conn.close()
+
+
+_coordinator = None
+
+
+def get_login_coordinator():
+    """ Get the coordinator shared by the routers of this process. """
+    global _coordinator
+    if _coordinator is None:
+        _coordinator = LoginCoordinator()
+    return _coordinator
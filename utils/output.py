@@ -0,0 +1,163 @@
+import json
+import sys
+
+from utils import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+TEXT = 'text'
+JSON = 'json'
+NDJSON = 'ndjson'
+FORMATS = (TEXT, JSON, NDJSON)
+
+
+def dumps(record):
+    """
+    Encode a record as JSON, using orjson when it is installed.
+
+    Args:
+        record (dict | list): The record to encode.
+
+    Returns:
+        str: The JSON text.
+    """
+    if orjson is not None:
+        return orjson.dumps(record).decode()
+    return json.dumps(record)
+
+
+def is_structured(fmt=None):
+    """ Check whether a format (the current default if None) is a JSON flavour. """
+    return (fmt or settings.OUTPUT_FORMAT) != TEXT
+
+
+def render(obj, fmt=None, **kwargs):
+    """
+    Render a model in one go.
+
+    Models provide `text(**kwargs)` for the human format and `records(**kwargs)`
+    for the structured ones. Collections set `many = True` and are rendered as
+    JSON arrays, other models as a single JSON object.
+
+    Args:
+        obj: The model to render.
+        fmt (str): One of `FORMATS`, defaults to `settings.OUTPUT_FORMAT`.
+
+    Returns:
+        str: The rendered model.
+    """
+    fmt = fmt or settings.OUTPUT_FORMAT
+    if fmt == TEXT:
+        return obj.text(**kwargs)
+    records = obj.records(**kwargs)
+    if fmt == NDJSON:
+        return '\n'.join(dumps(record) for record in records)
+    return dumps(list(records)) if getattr(obj, 'many', False) else dumps(next(iter(records)))
+
+
+class OutputWriter:
+    """
+    Writes models to a stream as they come, without building the whole output in memory.
+
+    In JSON mode every `write` emits one complete JSON value, streamed record by
+    record for collections. In NDJSON mode every record is a line of its own and
+    the stream is flushed after each model, so readers such as jq see results as
+    soon as a router answers.
+
+    Args:
+        stream (TextIO): The destination, defaults to stdout.
+        fmt (str): One of `FORMATS`, defaults to `settings.OUTPUT_FORMAT`.
+    """
+
+    def __init__(self, stream=None, fmt=None):
+        self.stream = stream or sys.stdout
+        self.fmt = fmt or settings.OUTPUT_FORMAT
+        if self.fmt not in FORMATS:
+            raise ValueError(f'Unknown output format: {self.fmt}')
+
+    def write(self, obj, **kwargs):
+        """
+        Write a model.
+
+        Args:
+            obj: The model, see `render`.
+            **kwargs: Passed to the `text`/`records` methods of the model.
+        """
+        write = self.stream.write
+        if self.fmt == TEXT:
+            write(obj.text(**kwargs) + '\n')
+        elif self.fmt == NDJSON:
+            for record in obj.records(**kwargs):
+                write(dumps(record) + '\n')
+        else:
+            self._write_json(obj, **kwargs)
+            write('\n')
+        self.stream.flush()
+
+    def _write_json(self, obj, **kwargs):
+        """ Write a model as a JSON value, record by record for collections. """
+        write = self.stream.write
+        if not hasattr(obj, 'records'):
+            write(dumps(obj))
+        elif getattr(obj, 'many', False):
+            separator = '['
+            for record in obj.records(**kwargs):
+                write(separator + dumps(record))
+                separator = ','
+            write('[]' if separator == '[' else ']')
+        else:
+            write(dumps(next(iter(obj.records(**kwargs)))))
+
+    def write_results(self, results):
+        """
+        Write the results of several actions as one document.
+
+        In JSON mode the document is an object keyed by action, an action run
+        again after a write is keyed with its occurrence, e.g. 'info#2'. In NDJSON
+        mode every record is a line tagged with its action. Results that are not
+        models, such as the outcome of a restart, are written as they are.
+
+        Args:
+            results (list[tuple[str, object]]): The (action, result) pairs.
+        """
+        write = self.stream.write
+        if self.fmt == TEXT:
+            for action, result in results:
+                if hasattr(result, 'text'):
+                    write(f'[{action}]\n{result.text()}\n\n')
+        elif self.fmt == NDJSON:
+            for action, result in results:
+                if hasattr(result, 'records'):
+                    for record in result.records():
+                        write(dumps({'action': action, **record}) + '\n')
+                else:
+                    write(dumps({'action': action, 'result': result}) + '\n')
+                self.stream.flush()
+        else:
+            separator = '{'
+            occurrences = {}
+            for action, result in results:
+                occurrences[action] = occurrences.get(action, 0) + 1
+                key = action if occurrences[action] == 1 else f'{action}#{occurrences[action]}'
+                write(f'{separator}{dumps(key)}:')
+                self._write_json(result)
+                separator = ','
+            write('{}\n' if separator == '{' else '}\n')
+        self.stream.flush()
+
+    def write_record(self, record):
+        """
+        Write a plain dict, as a line of text or JSON.
+
+        Args:
+            record (dict): The record.
+        """
+        if self.fmt == TEXT:
+            self.stream.write('\n'.join(f'{key}: {value}' for key, value in record.items()) + '\n')
+        else:
+            self.stream.write(dumps(record) + '\n')
+        self.stream.flush()
@@ -0,0 +1,292 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+
+# Router methods polled by `PollScheduler.add_router`, with their default interval in seconds.
+DEFAULT_ENDPOINTS = {
+    'info': ('get_router_information', 60),
+    'devices': ('get_connected_devices', 300),
+    'macfiltering': ('get_mac_filters', 3600),
+}
+
+
+class CircuitBreaker:
+    """
+    Stops polling a router that keeps failing.
+
+    After `failure_threshold` consecutive failures the breaker opens and no
+    request is made for `reset_timeout` seconds. Then a single probe is let
+    through (half-open): a success closes the breaker, a failure opens it again
+    for twice as long, up to `max_reset_timeout`.
+
+    Args:
+        failure_threshold (int): The consecutive failures that open the breaker.
+        reset_timeout (float): The first open period in seconds.
+        max_reset_timeout (float): The longest open period in seconds.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=3, reset_timeout=60, max_reset_timeout=3600):
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    @property
+    def retry_at(self):
+        """ The time at which the next probe is allowed. """
+        return self.opened_at + self.reset_timeout
+
+    def allow(self, now):
+        """ Check whether a request can be made at `now`. """
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and now >= self.retry_at:
+            self.state = self.HALF_OPEN
+            return True
+        return False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.reset_timeout = self.base_reset_timeout
+
+    def record_failure(self, now):
+        self.failures += 1
+        if self.state == self.HALF_OPEN:
+            self.reset_timeout = min(self.reset_timeout * 2, self.max_reset_timeout)
+            self._open(now)
+        elif self.failures >= self.failure_threshold:
+            self._open(now)
+
+    def _open(self, now):
+        self.state = self.OPEN
+        self.opened_at = now
+
+
+@dataclass(order=True)
+class PollTask:
+    """
+    Represents the periodic polling of one endpoint of one router.
+
+    Tasks are ordered by their next run time in the scheduler queue.
+
+    Attributes:
+        next_run (float): When the task is due.
+        seq (int): A tie breaker keeping the queue order stable.
+        router (str): The router identifier.
+        endpoint (str): The endpoint name.
+        fetch (Callable): Polls the endpoint and returns its data.
+        interval (float): The current interval in seconds.
+        min_interval (float): The shortest interval, used while the data keeps changing.
+        max_interval (float): The longest interval, reached while the data stays the same.
+        fingerprint (Any): A digest of the last data, to detect changes.
+    """
+    next_run: float
+    seq: int
+    router: str = field(compare=False)
+    endpoint: str = field(compare=False)
+    fetch: Callable[[], Any] = field(compare=False)
+    interval: float = field(compare=False)
+    min_interval: float = field(compare=False)
+    max_interval: float = field(compare=False)
+    fingerprint: Optional[Any] = field(default=None, compare=False)
+
+
+def fingerprint(result):
+    """ Digest the data of a poll, models are compared through their records. """
+    if hasattr(result, 'records'):
+        return hash(repr(list(result.records())))
+    return hash(repr(result))
+
+
+class PollScheduler:
+    """
+    Polls many routers and endpoints, each at its own adaptive rate.
+
+    Tasks live in a priority queue keyed by their next run time. When the data
+    of a task changes its interval shrinks by `speedup`, when it does not the
+    interval grows by `slowdown`, within the task bounds. Every next run time
+    is jittered to spread the load, and each router has a circuit breaker so a
+    dead router only costs one probe per open period.
+
+    Args:
+        on_result (Callable): Called with (router, endpoint, result) after each successful poll.
+        on_error (Callable): Called with (router, endpoint, exception) after each failed poll.
+        jitter (float): The relative jitter applied to the intervals.
+        speedup (float): The interval factor applied when the data changed.
+        slowdown (float): The interval factor applied when the data did not change.
+        max_workers (int): The maximum number of concurrent polls.
+        breaker_factory (Callable): Creates the circuit breaker of a router.
+        clock (Callable): Returns the current time in seconds.
+    """
+
+    def __init__(self, on_result=None, on_error=None, jitter=0.1, speedup=0.5, slowdown=1.5,
+                 max_workers=8, breaker_factory=CircuitBreaker, clock=time.monotonic):
+        self.on_result = on_result
+        self.on_error = on_error
+        self.jitter = jitter
+        self.speedup = speedup
+        self.slowdown = slowdown
+        self.max_workers = max_workers
+        self.breaker_factory = breaker_factory
+        self.clock = clock
+        self.queue = []
+        self.breakers = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    def add(self, router, endpoint, fetch, interval, min_interval=None, max_interval=None):
+        """
+        Schedule the polling of an endpoint.
+
+        The first run is spread uniformly over the first interval.
+
+        Args:
+            router (str): The router identifier.
+            endpoint (str): The endpoint name.
+            fetch (Callable): Polls the endpoint and returns its data.
+            interval (float): The starting interval in seconds.
+            min_interval (float): The shortest interval, defaults to a quarter of `interval`.
+            max_interval (float): The longest interval, defaults to eight times `interval`.
+        """
+        task = PollTask(
+            next_run=self.clock() + random.uniform(0, interval),
+            seq=next(self._seq),
+            router=router,
+            endpoint=endpoint,
+            fetch=fetch,
+            interval=interval,
+            min_interval=min_interval or interval / 4,
+            max_interval=max_interval or interval * 8,
+        )
+        self.breakers.setdefault(router, self.breaker_factory())
+        with self._lock:
+            heapq.heappush(self.queue, task)
+        return task
+
+    def add_router(self, name, router, endpoints=None):
+        """
+        Schedule the endpoints of a logged in router.
+
+        Args:
+            name (str): The router identifier.
+            router (Router): The router.
+            endpoints (dict): Endpoint name to (router method, interval) pairs, defaults to `DEFAULT_ENDPOINTS`.
+        """
+        for endpoint, (method, interval) in (endpoints or DEFAULT_ENDPOINTS).items():
+            self.add(name, endpoint, getattr(router, method), interval)
+
+    def _reschedule(self, task, now, interval):
+        task.next_run = now + interval * (1 + random.uniform(-self.jitter, self.jitter))
+        task.seq = next(self._seq)
+        with self._lock:
+            heapq.heappush(self.queue, task)
+        self._wakeup.set()
+
+    def _due(self, now):
+        due = []
+        with self._lock:
+            while self.queue and self.queue[0].next_run <= now:
+                due.append(heapq.heappop(self.queue))
+        return due
+
+    def _report_error(self, task, ex):
+        if self.on_error:
+            try:
+                self.on_error(task.router, task.endpoint, ex)
+            except Exception:
+                traceback.print_exc()
+
+    def _poll(self, task):
+        breaker = self.breakers[task.router]
+        try:
+            try:
+                result = task.fetch()
+                if result is False or result is None:
+                    raise RuntimeError(f'{task.endpoint} returned no data')
+            except Exception as ex:
+                breaker.record_failure(self.clock())
+                self._report_error(task, ex)
+                return
+
+            breaker.record_success()
+            digest = fingerprint(result)
+            factor = self.speedup if digest != task.fingerprint else self.slowdown
+            task.fingerprint = digest
+            task.interval = min(task.max_interval, max(task.min_interval, task.interval * factor))
+            if self.on_result:
+                try:
+                    self.on_result(task.router, task.endpoint, result)
+                except Exception as ex:
+                    # The router answered, a failing consumer does not count against its breaker.
+                    self._report_error(task, ex)
+        finally:
+            # The task always goes back to the queue, whatever failed.
+            self._reschedule(task, self.clock(), task.interval)
+
+    def run_pending(self, executor=None):
+        """
+        Run the tasks that are due.
+
+        Tasks of routers whose breaker is open are postponed to the breaker's
+        retry time without making any request. The polls are not waited for,
+        each one puts its task back in the queue when it ends, so a slow router
+        never holds up the others.
+
+        Args:
+            executor (Executor): Runs the polls, they run inline if None.
+
+        Returns:
+            int: The number of polls started.
+        """
+        now = self.clock()
+        started = []
+        for task in self._due(now):
+            breaker = self.breakers[task.router]
+            if not breaker.allow(now):
+                # Leave the probe of a half-open breaker to the task that got it.
+                self._reschedule(task, max(breaker.retry_at, now), task.min_interval)
+                continue
+            if executor:
+                executor.submit(self._poll, task)
+            else:
+                self._poll(task)
+            started.append(task)
+        return len(started)
+
+    def next_run(self):
+        """ The time at which the next task is due, or None if there are no tasks. """
+        with self._lock:
+            return self.queue[0].next_run if self.queue else None
+
+    def run(self, stop=None):
+        """
+        Poll until `stop` is set.
+
+        Args:
+            stop (threading.Event): Stops the loop when set.
+        """
+        stop = stop or threading.Event()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while not stop.is_set():
+                self._wakeup.clear()
+                self.run_pending(executor)
+                next_run = self.next_run()
+                delay = 1.0 if next_run is None else max(0.0, next_run - self.clock())
+                # Sleep until the next task is due or a poll puts its task back, checking `stop` every second.
+                self._wakeup.wait(min(delay, 1.0))
@@ -0,0 +1,117 @@
+import hashlib
+import hmac
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+def salted_password(password, salt, iterations):
+    """
+    Derive the SCRAM salted password.
+
+    Args:
+        password (str): The password.
+        salt (str): The hexadecimal salt chosen by the router.
+        iterations (int): The PBKDF2 iteration count chosen by the router.
+
+    Returns:
+        bytes: The 32 bytes salted password.
+    """
+    return hashlib.pbkdf2_hmac('sha256', password.encode(), bytes.fromhex(salt), iterations, dklen=32)
+
+
+def proof_from_salted_password(salted, auth_msg):
+    """
+    Compute the SCRAM client proof from a salted password.
+
+    The client key and the client signature are XORed as two 256 bits integers
+    rather than word by word.
+
+    Args:
+        salted (bytes): The salted password.
+        auth_msg (str): The authentication message.
+
+    Returns:
+        str: The hexadecimal client proof.
+    """
+    client_key = hmac.new(b"Client Key", salted, hashlib.sha256).digest()
+    stored_key = hashlib.sha256(client_key).digest()
+    signature = hmac.new(auth_msg.encode(), stored_key, hashlib.sha256).digest()
+    proof = int.from_bytes(client_key, 'big') ^ int.from_bytes(signature, 'big')
+    return proof.to_bytes(len(client_key), 'big').hex()
+
+
+def client_proof(password, salt, iterations, auth_msg):
+    """
+    Compute the SCRAM client proof of a login.
+
+    Args:
+        password (str): The password.
+        salt (str): The hexadecimal salt chosen by the router.
+        iterations (int): The PBKDF2 iteration count chosen by the router.
+        auth_msg (str): The authentication message.
+
+    Returns:
+        str: The hexadecimal client proof.
+    """
+    return proof_from_salted_password(salted_password(password, salt, iterations), auth_msg)
+
+
+class ScramEngine:
+    """
+    Runs SCRAM key derivations on a pool sized to the host's cores.
+
+    `hashlib.pbkdf2_hmac` releases the GIL, so a thread pool already spreads
+    concurrent logins over all the cores. A process pool can be used instead
+    on interpreters where that is not the case.
+
+    Args:
+        max_workers (int): The pool size, defaults to the number of cores.
+        use_processes (bool): Use a process pool instead of a thread pool.
+    """
+
+    def __init__(self, max_workers=None, use_processes=False):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        pool = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        self.executor = pool(max_workers=self.max_workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def client_proof(self, password, salt, iterations, auth_msg):
+        """
+        Schedule the computation of a client proof.
+
+        Returns:
+            Future[str]: The hexadecimal client proof, see `client_proof`.
+        """
+        return self.executor.submit(client_proof, password, salt, iterations, auth_msg)
+
+    def client_proofs(self, logins):
+        """
+        Compute the client proofs of many logins concurrently.
+
+        Args:
+            logins (Iterable[tuple[str, str, int, str]]): (password, salt, iterations, auth_msg) tuples.
+
+        Returns:
+            list[str]: The hexadecimal client proofs, in order.
+        """
+        return list(self.executor.map(client_proof, *zip(*logins)))
+
+    def shutdown(self):
+        """ Stop the pool. """
+        self.executor.shutdown()
+
+
+_engine = None
+
+
+def get_scram_engine():
+    """ Get the engine shared by the routers of this process. """
+    global _engine
+    if _engine is None:
+        _engine = ScramEngine()
+    return _engine
@@ -1 +1,17 @@
-AS_JSON = False
+import os
+
+# Default output format of the models, one of utils.output.FORMATS.
+OUTPUT_FORMAT = 'text'
+
+# Per-user state directory, never a shared one that other users could plant files in.
+STATE_DIR = os.path.join(
+    os.environ.get('XDG_STATE_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'state'),
+    'router-manager'
+)
+
+# Login throttle state shared by all the processes of the user, see utils.login_throttle.
+LOGIN_STATE_PATH = os.path.join(STATE_DIR, 'logins.sqlite')
+LOGIN_MAX_WAIT = 60
+
+# Default timeout of router HTTP requests, in seconds.
+REQUEST_TIMEOUT = 10
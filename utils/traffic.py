@@ -0,0 +1,183 @@
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+
+def _write_varint(buffer, value):
+    """ Append a signed integer to a bytearray as a zigzag LEB128 varint. """
+    value = value * 2 if value >= 0 else -value * 2 - 1
+    while value > 0x7F:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varints(buffer):
+    """ Yield the signed integers of a buffer written by `_write_varint`. """
+    value = shift = 0
+    for byte in buffer:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        yield value >> 1 if not value & 1 else -(value >> 1) - 1
+        value = shift = 0
+
+
+class DeltaEncodedSeries:
+    """
+    An append-only series of (timestamp, value) integer samples.
+
+    Timestamps are stored as deltas of deltas and values as deltas, both as
+    zigzag varints, so a counter polled at a steady rate costs a few bytes per
+    sample.
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+        self.count = 0
+        self.last = None
+        self._last_interval = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        """ The size of the encoded samples. """
+        return len(self.data)
+
+    def append(self, timestamp, value):
+        """
+        Add a sample.
+
+        Args:
+            timestamp (int): The sample time in seconds, not older than the last one.
+            value (int): The sample value.
+        """
+        if self.last is None:
+            _write_varint(self.data, timestamp)
+            _write_varint(self.data, value)
+        else:
+            interval = timestamp - self.last[0]
+            _write_varint(self.data, interval - self._last_interval)
+            _write_varint(self.data, value - self.last[1])
+            self._last_interval = interval
+        self.last = (timestamp, value)
+        self.count += 1
+
+    def __iter__(self):
+        numbers = _read_varints(self.data)
+        timestamp = value = interval = 0
+        for i, (a, b) in enumerate(zip(numbers, numbers)):
+            if i == 0:
+                timestamp, value = a, b
+            else:
+                interval += a
+                timestamp += interval
+                value += b
+            yield timestamp, value
+
+
+def increase(previous, current):
+    """
+    The growth of a cumulative counter between two readings.
+
+    A counter that went down was reset, by a reboot or by clearing the
+    statistics, so everything it counts now was counted since the reset.
+    """
+    return current - previous if current >= previous else current
+
+
+@dataclass
+class TrafficRate:
+    """
+    Represents the bandwidth used by a router between two samples.
+
+    Attributes:
+        timestamp (int): The time of the second sample.
+        download_rate (float): The download rate in bytes per second.
+        upload_rate (float): The upload rate in bytes per second.
+        reset (bool): True if a counter was reset between the samples.
+    """
+    timestamp: int
+    download_rate: float
+    upload_rate: float
+    reset: bool
+
+
+def _rate(previous, current):
+    (t0, download0, upload0), (t1, download1, upload1) = previous, current
+    elapsed = max(t1 - t0, 1)
+    return TrafficRate(
+        timestamp=t1,
+        download_rate=increase(download0, download1) / elapsed,
+        upload_rate=increase(upload0, upload1) / elapsed,
+        reset=download1 < download0 or upload1 < upload0,
+    )
+
+
+class TrafficCollector:
+    """
+    Turns the cumulative traffic counters of routers into rates.
+
+    The raw counters of every router are kept as delta-encoded series, rates
+    are derived from them on demand.
+    """
+
+    def __init__(self):
+        self.series = {}
+
+    def add(self, router, statistics, timestamp=None) -> Optional[TrafficRate]:
+        """
+        Record the counters of a router.
+
+        Args:
+            router (str): The router identifier.
+            statistics (TrafficStatisticsBase): The polled counters.
+            timestamp (int): The poll time in seconds, defaults to now.
+
+        Returns:
+            TrafficRate | None: The rate since the previous sample, None for the first one.
+        """
+        timestamp = int(timestamp if timestamp is not None else time.time())
+        download, upload = self.series.setdefault(router, (DeltaEncodedSeries(), DeltaEncodedSeries()))
+        previous = (download.last[0], download.last[1], upload.last[1]) if download.last else None
+        download.append(timestamp, statistics.total_download)
+        upload.append(timestamp, statistics.total_upload)
+        if previous is None:
+            return None
+        return _rate(previous, (timestamp, statistics.total_download, statistics.total_upload))
+
+    def on_result(self, router, endpoint, result):
+        """ Record the traffic polls of a `PollScheduler`, other endpoints are ignored. """
+        if endpoint == 'traffic':
+            self.add(router, result)
+
+    def rates(self, router):
+        """
+        Compute the rates between consecutive samples of a router.
+
+        Returns:
+            list[TrafficRate]: The rates in time order.
+        """
+        if router not in self.series:
+            return []
+        download, upload = self.series[router]
+        samples = [(t, d, u) for (t, d), (_, u) in zip(download, upload)]
+        return [_rate(previous, current) for previous, current in zip(samples, samples[1:])]
+
+    def totals(self, router):
+        """
+        The bytes transferred by a router over all its samples, across counter resets.
+
+        Returns:
+            tuple[int, int]: The downloaded and uploaded bytes.
+        """
+        if router not in self.series:
+            return 0, 0
+        totals = []
+        for series in self.series[router]:
+            values = [value for _, value in series]
+            totals.append(sum(increase(a, b) for a, b in zip(values, values[1:])))
+        return tuple(totals)
@@ -1,31 +1,183 @@
+import re
 import xml.etree.ElementTree as ET
 
+try:
+    from lxml import etree as _lxml
+except ImportError:
+    _lxml = None
+
+
+# The parser used by `parse`, 'lxml' when it is installed, 'etree' otherwise.
+BACKEND = 'lxml' if _lxml is not None else 'etree'
+
+
+def parse(content):
+    """
+    Parses an XML document with the fastest available backend.
+
+    Both backends return elements with the ElementTree API (find, findall,
+    iteration, tag and text), so callers do not depend on the backend.
+
+    Args:
+        content (bytes | str): The document, preferably the raw response bytes.
+
+    Returns:
+        Element: The root element.
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    if _lxml is not None:
+        return _lxml.fromstring(content)
+    return ET.fromstring(content)
+
+
+def is_element(value):
+    """ Checks whether a value is an element of either backend. """
+    return hasattr(value, 'findall') and hasattr(value, 'tag')
+
+
+def find_text(content, tag):
+    """
+    Scans a response for the text of the first `<tag>` element, without parsing it.
+
+    Only suitable for leaf elements without attributes, such as `<token>` or `<code>`.
+
+    Args:
+        content (bytes): The response bytes.
+        tag (str): The element tag.
+
+    Returns:
+        str | None: The text of the element, None if it is not found.
+    """
+    start = content.find(b'<' + tag.encode() + b'>')
+    if start < 0:
+        return None
+    start += len(tag) + 2
+    end = content.find(b'</' + tag.encode() + b'>', start)
+    if end < 0:
+        return None
+    return content[start:end].decode('utf-8')
+
+
+# A leaf element without attributes, e.g. <rsrp>-95dBm</rsrp> or the empty <ActualName/>, the common case.
+_PLAIN_LEAF = re.compile(r'<([A-Za-z_][\w.-]*)\s*(?:/>|>([^<]*)</\1\s*>)')
+
+# Any leaf element, also <Name type="x">y</Name>, slower to match.
+_LEAF = re.compile(r'<([A-Za-z_][\w.-]*)(?:\s[^<>]*?)?(?:/>|>([^<]*)</\1\s*>)')
+
+# The predefined entities and the character references of XML.
+_REFERENCE = re.compile(r'&(?:#(\d+)|#x([0-9A-Fa-f]+)|(amp|lt|gt|quot|apos));')
+
+_ENTITIES = {'amp': '&', 'lt': '<', 'gt': '>', 'quot': '"', 'apos': "'"}
+
+
+def _reference(match):
+    decimal, hexadecimal, name = match.groups()
+    if name:
+        return _ENTITIES[name]
+    return chr(int(decimal) if decimal else int(hexadecimal, 16))
+
+
+def _leaf_pattern(text):
+    # Attributes need an '=', without one the plain pattern matches every leaf.
+    # The XML declaration has attributes of its own, it is skipped.
+    start = text.find('?>') + 2 if text.startswith('<?') else 0
+    return _LEAF if text.find('=', start) >= 0 else _PLAIN_LEAF
+
+
+def _scan(text, pattern=None):
+    # findall keeps document order, reversing it lets the first element of a tag win.
+    values = dict(reversed((pattern or _leaf_pattern(text)).findall(text)))
+    if '&' in text:
+        values = {tag: _REFERENCE.sub(_reference, value) for tag, value in values.items()}
+    return values
+
+
+def _parsed_leaves(node):
+    return {tag: text or '' for tag, text in children_text(node).items()}
+
+
+def leaves(content):
+    """
+    Scans a flat response for the text of its leaf elements, without building a tree.
+
+    Router responses such as /api/device/information are a single level of
+    leaf elements, for which this is several times faster than any parser.
+    Documents with CDATA sections are parsed instead.
+
+    Args:
+        content (bytes | str): The response bytes.
+
+    Returns:
+        dict[str, str]: The text of each leaf tag, empty for empty elements, the first element wins when a tag repeats.
+    """
+    text = content.decode('utf-8') if isinstance(content, bytes) else content
+    if '<![CDATA[' in text:
+        return _parsed_leaves(parse(text))
+    return _scan(text)
+
+
+def records(content, tag):
+    """
+    Scans a response for the leaves of every `<tag>` element, without building a tree.
+
+    Args:
+        content (bytes | str): The response bytes.
+        tag (str): The tag of the records, e.g. 'Host' in /api/lan/HostInfo.
+
+    Returns:
+        list[dict[str, str]]: The leaves of each record, in document order.
+    """
+    text = content.decode('utf-8') if isinstance(content, bytes) else content
+    if '<![CDATA[' in text:
+        return [_parsed_leaves(node) for node in parse(text).iter(tag)]
+
+    closing = f'</{tag}>'
+    pattern = _leaf_pattern(text)
+    return [_scan(chunk.split(closing, 1)[0], pattern) for chunk in text.split(f'<{tag}>')[1:]]
+
+
+def children_text(root):
+    """
+    Maps the tags of the children of an element to their text, in a single pass.
+
+    When a tag appears several times the first element wins, like `find`.
+
+    Args:
+        root (Element): The parent element.
+
+    Returns:
+        dict[str, str]: The text of each child tag.
+    """
+    texts = {}
+    for child in root:
+        if isinstance(child.tag, str):
+            texts.setdefault(child.tag, child.text)
+    return texts
+
 
 def merge_xml(xml1, xml2):
     """
     Merges two XML files with the same root.
 
     Args:
-        xml_file1 (str): The string of the first XML.
-        xml_file2 (str): The string of the second XML.
+        xml_file1 (bytes | str): The first XML.
+        xml_file2 (bytes | str): The second XML.
 
     Returns:
-        str: The merged XML string.
+        bytes: The merged XML string.
     """
-    
-    root1 = ET.fromstring(xml1)
-    root2 = ET.fromstring(xml2)
+
+    root1 = parse(xml1)
+    root2 = parse(xml2)
 
     # Merge the root elements
     merged_root = merge_elements(root1, root2)
 
-    # Create a new XML tree with the merged root
-    merged_tree = ET.ElementTree(merged_root)
-
     # Convert the merged XML tree to a string
-    merged_xml = ET.tostring(merged_tree.getroot(), encoding="utf-8")
-
-    return merged_xml
+    if _lxml is not None:
+        return _lxml.tostring(merged_root, encoding="utf-8")
+    return ET.tostring(merged_root, encoding="utf-8")
 
 
 def merge_elements(element1, element2):
@@ -39,33 +191,27 @@ def merge_elements(element1, element2):
     Returns:
         Element: The merged XML element.
     """
-    merged_element = ET.Element(element1.tag)
+    merged_element = element1.makeelement(element1.tag, {})
+    merged_element.text = element1.text if element1.text is not None else element2.text
 
     # Merge the attributes of the elements
-    merged_element.attrib = {**element1.attrib, **element2.attrib}
+    merged_element.attrib.update({**element1.attrib, **element2.attrib})
+
+    # Index the children of element2 by tag, the first one of each tag is merged
+    children2 = {}
+    for child2 in element2:
+        children2.setdefault(child2.tag, child2)
 
     # Merge the children elements
     merged_children = []
+    tags1 = set()
     for child1 in element1:
-        found = False
-        for child2 in element2:
-            if child1.tag == child2.tag:
-                merged_child = merge_elements(child1, child2)
-                merged_children.append(merged_child)
-                found = True
-                break
-        if not found:
-            merged_children.append(child1)
+        tags1.add(child1.tag)
+        child2 = children2.get(child1.tag)
+        merged_children.append(merge_elements(child1, child2) if child2 is not None else child1)
 
     # Append the remaining children of element2
-    for child2 in element2:
-        found = False
-        for child1 in element1:
-            if child1.tag == child2.tag:
-                found = True
-                break
-        if not found:
-            merged_children.append(child2)
+    merged_children.extend(child2 for child2 in element2 if child2.tag not in tags1)
 
     merged_element.extend(merged_children)
-    return merged_element
\ No newline at end of file
+    return merged_element